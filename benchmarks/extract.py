@@ -0,0 +1,89 @@
+"""Compare the mypy and the AST extraction engines on a synthetic project.
+
+Most files call `.get` with string literals, and some of them use
+`Final` constants, so the AST engine has to fall back to mypy for them.
+
+    python3 -m benchmarks.extract --files 500 --ambiguous 0.05
+"""
+from __future__ import annotations
+
+import time
+from argparse import ArgumentParser
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from l10n._cli import main as l10n
+
+
+LITERAL = '''
+from l10n import Locales
+
+loc = Locales()['en']
+
+
+def handler_{index}(n: int) -> str:
+    a = loc.get('message {index} a')
+    b = loc.get('message {index} b', context='ctx')
+    c = loc.get('{{n}} item {index}', plural='{{n}} items {index}', n=n)
+    return a + b + c
+'''
+AMBIGUOUS = '''
+from typing import Final
+
+from l10n import Locales
+
+MSG: Final = 'constant {index}'
+loc = Locales()['en']
+
+
+def handler_{index}() -> str:
+    return loc.get(MSG)
+'''
+
+
+def make_project(root: Path, *, files: int, ambiguous: float) -> None:
+    (root / 'pyproject.toml').write_text('')
+    package = root / 'app'
+    package.mkdir()
+    (package / '__init__.py').write_text('')
+    step = round(1 / ambiguous) if ambiguous else 0
+    for index in range(files):
+        template = AMBIGUOUS if step and index % step == 0 else LITERAL
+        (package / f'mod{index}.py').write_text(template.format(index=index))
+
+
+def extract(root: Path, engine: str) -> tuple[float, bytes]:
+    po_path = root / 'locales' / 'ru.po'
+    po_path.unlink(missing_ok=True)
+    start = time.perf_counter()
+    code = l10n([
+        'extract', '--path', str(root), '--lang', 'ru', '--engine', engine,
+        '--now', '2022-01-02T03:04:05+00:00',
+    ], stream=StringIO())
+    elapsed = time.perf_counter() - start
+    assert code == 0, f'{engine} engine has failed'
+    return elapsed, po_path.read_bytes()
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument(
+        '--ambiguous', type=float, default=0.05,
+        help='the share of files that need mypy',
+    )
+    args = parser.parse_args()
+    with TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        make_project(root, files=args.files, ambiguous=args.ambiguous)
+        mypy_time, mypy_po = extract(root, 'mypy')
+        ast_time, ast_po = extract(root, 'ast')
+    assert ast_po == mypy_po, 'the engines produced different PO files'
+    print(f'files: {args.files}, ambiguous: {args.ambiguous:.0%}')
+    print(f'mypy: {mypy_time:.2f}s')
+    print(f'ast:  {ast_time:.2f}s ({mypy_time / ast_time:.1f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Compare finding the default catalog with `inspect.stack` and a raw frame walk.
+
+`Locales()` without a path looks up the call stack for the calling module,
+so the cost of `Locales().path` depends on how deep the caller is.
+
+    python3 -m benchmarks.locales --depth 300 --number 100
+"""
+from __future__ import annotations
+
+import inspect
+import timeit
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from l10n import Locales, _locales
+
+
+T = TypeVar('T')
+
+
+class InspectLocales(Locales):
+    """Locales that finds the catalog the way it was done before the frame walk.
+    """
+
+    @staticmethod
+    def _find_catalog() -> Path:
+        for frame in inspect.stack():
+            if frame.filename == _locales.__file__:
+                continue
+            file_path = Path(frame.filename)
+            if file_path.name == 'functools.py':
+                continue
+            for dir_path in file_path.parents:
+                catalog_path = dir_path / 'locales'
+                if dir_path.exists():
+                    return catalog_path
+        raise FileNotFoundError('cannot find catalog')
+
+
+def at_depth(depth: int, func: Callable[[], T]) -> T:
+    """Call the function with the given number of frames on the stack.
+    """
+    if depth <= 0:
+        return func()
+    return at_depth(depth - 1, func)
+
+
+def measure(cls: type[Locales], number: int) -> float:
+    """The average time of `cls().path` in seconds.
+    """
+    return timeit.timeit(lambda: cls().path, number=number) / number
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--depth', type=int, default=300)
+    parser.add_argument('--number', type=int, default=100)
+    args = parser.parse_args()
+    old_path = at_depth(args.depth, lambda: InspectLocales().path)
+    new_path = at_depth(args.depth, lambda: Locales().path)
+    assert old_path == new_path, (old_path, new_path)
+
+    old = at_depth(args.depth, lambda: measure(InspectLocales, args.number))
+    new = at_depth(args.depth, lambda: measure(Locales, args.number))
+    print(f'stack depth: {args.depth} frames')
+    print(f'inspect.stack: {old * 1e6:8.1f}us')
+    print(f'frame walk:    {new * 1e6:8.1f}us ({old / new:.0f}x faster)')
+
+
+if __name__ == '__main__':
+    main()
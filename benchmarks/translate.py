@@ -0,0 +1,91 @@
+"""Compare batched concurrent translation with one request per message.
+
+The backend is an in-process stub that waits a fixed time per request,
+like a remote service would. The catalog has duplicate messages,
+which are sent only once per language by the batch translator.
+
+    python3 -m benchmarks.translate --messages 300 --languages 10 --latency 0.02
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from argparse import ArgumentParser
+from typing import Sequence
+
+from l10n._backends import Backend, BatchTranslator
+
+
+class SlowBackend(Backend):
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.requests = 0
+
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return [f'{dest}: {text}' for text in texts]
+
+
+async def translate_one_by_one(
+    backend: Backend,
+    messages: dict[str, list[str]],
+) -> None:
+    """What `l10n translate` did before: one blocking request per entry.
+    """
+    for dest, texts in messages.items():
+        for text in texts:
+            await backend.translate_batch([text], src='en', dest=dest)
+
+
+async def translate_batched(
+    backend: Backend,
+    messages: dict[str, list[str]],
+    concurrency: int,
+) -> None:
+    translator = BatchTranslator(backend=backend, concurrency=concurrency)
+    await translator.translate(messages, src='en')
+
+
+def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=300)
+    parser.add_argument('--languages', type=int, default=10)
+    parser.add_argument(
+        '--latency', type=float, default=.02,
+        help='seconds the stub spends on each request',
+    )
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+    # every tenth message is a duplicate of another one
+    texts = [f'message {i - i % 10 if i % 10 == 9 else i}' for i in range(args.messages)]
+    messages = {f'lang{i}': texts for i in range(args.languages)}
+    total = args.messages * args.languages
+    print(f'messages: {total}, latency: {args.latency * 1000:.0f}ms per request')
+
+    backend = SlowBackend(args.latency)
+    start = time.perf_counter()
+    asyncio.run(translate_one_by_one(backend, messages))
+    serial = time.perf_counter() - start
+    print(
+        f'one by one: {serial:.2f}s, {backend.requests} requests, '
+        f'{total / serial:.0f} messages/s',
+    )
+
+    backend = SlowBackend(args.latency)
+    start = time.perf_counter()
+    asyncio.run(translate_batched(backend, messages, args.concurrency))
+    batched = time.perf_counter() - start
+    print(
+        f'batched:    {batched:.2f}s, {backend.requests} requests, '
+        f'{total / batched:.0f} messages/s ({serial / batched:.0f}x faster)',
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,9 @@
 """A library and CLI for translating Python applications and libraries.
 """
+from ._context import activate, active_locale, get
 from ._locale import Locale
 from ._locales import Locales
 
 
 __version__ = '0.1.5'
-__all__ = ['Locales', 'Locale', 'entrypoint']
+__all__ = ['Locales', 'Locale', 'activate', 'active_locale', 'get', 'entrypoint']
@@ -0,0 +1,533 @@
+from __future__ import annotations
+
+import ast
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable, NamedTuple, Union
+
+from ._message import Message
+from ._sources import get_file_name
+
+
+# Arguments of `Locale.get` and `l10n.get`, in the order they can be passed positionally.
+ARGS = ('message',)
+STR_KWARGS = frozenset({'message', 'context', 'plural', 'comment'})
+KWARGS = STR_KWARGS | {'n'}
+
+# What a name refers to, as far as it matters for finding messages.
+MODULE = 'module'
+LOCALE_CLASS = 'Locale class'
+LOCALES_CLASS = 'Locales class'
+GET = 'get'
+LOCALE = 'Locale'
+LOCALES = 'Locales'
+# The name has values of different kinds assigned, only mypy can tell which one is used.
+AMBIGUOUS = 'ambiguous'
+
+# What can be imported from l10n modules.
+IMPORTS = {
+    'l10n': {'Locale': LOCALE_CLASS, 'Locales': LOCALES_CLASS, 'get': GET},
+    'l10n._locale': {'Locale': LOCALE_CLASS},
+    'l10n._locales': {'Locale': LOCALE_CLASS, 'Locales': LOCALES_CLASS},
+    'l10n._context': {'Locale': LOCALE_CLASS, 'get': GET},
+}
+
+Function = Union[ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda]
+
+
+class Result(NamedTuple):
+    messages: list[Message]
+    # Files that cannot be reliably analyzed without type inference.
+    ambiguous: list[Path]
+
+
+def extract_messages_ast(
+    paths: Iterable[Path], *,
+    names: Iterable[str] = (),
+    jobs: int = 1,
+) -> Result:
+    """Find messages in the given files by analyzing only their AST.
+
+    Finds `get` calls on objects that are known to be `Locale` instances,
+    either by how they are created or annotated or because their name
+    is listed in `names`, and calls of `l10n.get` function.
+    Names are looked up in the scope where they are used, the same way
+    as Python does it, and attributes of `self` in the class of the method.
+    If such a name may refer to objects of different kinds, or any argument
+    of the call isn't a literal, the file is reported as ambiguous
+    and should be analyzed by mypy instead.
+
+    Args:
+        paths: Python files to analyze.
+        names: names of variables and attributes that are always `Locale` instances.
+        jobs: how many processes to use for parsing files.
+    """
+    paths = list(paths)
+    names = frozenset(names)
+    result = Result([], [])
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(paths) // (jobs * 4))
+            results = list(executor.map(
+                _extract_file, paths, [names] * len(paths),
+                chunksize=chunksize,
+            ))
+    else:
+        results = [_extract_file(path, names) for path in paths]
+    for path, messages in zip(paths, results):
+        if messages is None:
+            result.ambiguous.append(path)
+        else:
+            result.messages.extend(messages)
+    return result
+
+
+def _extract_file(path: Path, names: frozenset[str]) -> list[Message] | None:
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (SyntaxError, ValueError, OSError):
+        return None
+    binder = Binder()
+    binder.visit(tree)
+    visitor = Visitor(file_name=get_file_name(path), names=names, scopes=binder.scopes)
+    visitor.visit(tree)
+    if visitor.ambiguous:
+        return None
+    return visitor.messages
+
+
+class Binding(NamedTuple):
+    """A value assigned to a name or an attribute.
+    """
+    # the scope in which the value and the annotation are evaluated
+    scope: Scope
+    value: ast.expr | None = None
+    annotation: ast.expr | None = None
+    # the kind of the value if it isn't an expression, like for imports
+    kind: str | None = None
+
+
+class Scope:
+    """Names bound in a module, class, or function.
+    """
+    def __init__(self, parent: Scope | None, *, is_class: bool = False) -> None:
+        self.parent = parent
+        self.is_class = is_class
+        self.bindings: dict[str, list[Binding]] = defaultdict(list)
+        self.globals: set[str] = set()
+        self.nonlocals: set[str] = set()
+        # For methods, the name of the first argument (`self` or `cls`).
+        self.self_name: str | None = None
+        # For classes, values assigned to attributes of `self` in methods.
+        self.attrs: dict[str, list[Binding]] = defaultdict(list)
+
+    @property
+    def root(self) -> Scope:
+        scope = self
+        while scope.parent is not None:
+            scope = scope.parent
+        return scope
+
+    def lookup(self, name: str) -> Scope | None:
+        """Find the scope where the name used in this scope is bound.
+
+        Like in Python, class bodies are not visible from methods.
+        """
+        if name in self.globals:
+            return self.root
+        if name in self.bindings:
+            return self
+        scope = self.parent
+        while scope is not None:
+            if not scope.is_class and name in scope.bindings:
+                return scope
+            scope = scope.parent
+        return None
+
+
+class ScopeVisitor(ast.NodeVisitor, ABC):
+    """Walk the tree keeping track of the current scope.
+
+    Comprehensions don't get their own scope, so their variables
+    are considered to be bound in the enclosing function.
+    """
+    scope: Scope
+
+    def visit_Module(self, node: ast.Module) -> None:
+        self.scope = self._enter(node, None)
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: Function) -> None:
+        # Decorators, defaults, and annotations are evaluated outside.
+        args = node.args
+        outside: list[ast.expr | None] = [*args.defaults, *args.kw_defaults]
+        if not isinstance(node, ast.Lambda):
+            outside.extend(node.decorator_list)
+            outside.append(node.returns)
+            outside.extend(arg.annotation for arg in _get_args(args))
+        for expr in outside:
+            if expr is not None:
+                self.visit(expr)
+        outer = self.scope
+        self.scope = self._enter(node, outer)
+        body = node.body if isinstance(node.body, list) else [node.body]
+        for stmt in body:
+            self.visit(stmt)
+        self.scope = outer
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        outside = [*node.decorator_list, *node.bases, *(k.value for k in node.keywords)]
+        for expr in outside:
+            self.visit(expr)
+        outer = self.scope
+        self.scope = self._enter(node, outer)
+        for stmt in node.body:
+            self.visit(stmt)
+        self.scope = outer
+
+    @abstractmethod
+    def _enter(self, node: ast.AST, parent: Scope | None) -> Scope:
+        """Get the scope for the module, class, or function node.
+        """
+
+
+class Binder(ScopeVisitor):
+    """Find all names bound in each scope and the values assigned to them.
+
+    It's done before looking for messages, so that names can be used
+    before the assignment, like a module-level variable in a function.
+    """
+    def __init__(self) -> None:
+        self.scopes: dict[ast.AST, Scope] = {}
+
+    def visit_Import(self, node: ast.Import) -> None:
+        for alias in node.names:
+            if alias.asname:
+                kind = MODULE if alias.name == 'l10n' else None
+                self._bind(alias.asname, Binding(self.scope, kind=kind))
+                continue
+            name = alias.name.partition('.')[0]
+            kind = MODULE if name == 'l10n' else None
+            self._bind(name, Binding(self.scope, kind=kind))
+
+    def visit_ImportFrom(self, node: ast.ImportFrom) -> None:
+        for alias in node.names:
+            if alias.name == '*':
+                continue
+            kind = None
+            if not node.level and node.module in IMPORTS:
+                kind = IMPORTS[node.module].get(alias.name)
+            self._bind(alias.asname or alias.name, Binding(self.scope, kind=kind))
+
+    def visit_Global(self, node: ast.Global) -> None:
+        self.scope.globals.update(node.names)
+
+    def visit_Nonlocal(self, node: ast.Nonlocal) -> None:
+        self.scope.nonlocals.update(node.names)
+
+    def visit_Assign(self, node: ast.Assign) -> None:
+        for target in node.targets:
+            self._assign(target, Binding(self.scope, value=node.value))
+        self.visit(node.value)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> None:
+        binding = Binding(self.scope, value=node.value, annotation=node.annotation)
+        self._assign(node.target, binding)
+        if node.value is not None:
+            self.visit(node.value)
+
+    def visit_NamedExpr(self, node: ast.NamedExpr) -> None:
+        self._assign(node.target, Binding(self.scope, value=node.value))
+        self.visit(node.value)
+
+    def visit_Name(self, node: ast.Name) -> None:
+        # targets of `for`, `with`, `del`, augmented assignment, and so on
+        if not isinstance(node.ctx, ast.Load):
+            self._bind(node.id, Binding(self.scope))
+
+    def visit_ExceptHandler(self, node: ast.ExceptHandler) -> None:
+        if node.name:
+            self._bind(node.name, Binding(self.scope))
+        self.generic_visit(node)
+
+    def visit_MatchAs(self, node: ast.AST) -> None:
+        name = getattr(node, 'name', None)
+        if name:
+            self._bind(name, Binding(self.scope))
+        self.generic_visit(node)
+
+    visit_MatchStar = visit_MatchAs
+
+    def visit_MatchMapping(self, node: ast.AST) -> None:
+        rest = getattr(node, 'rest', None)
+        if rest:
+            self._bind(rest, Binding(self.scope))
+        self.generic_visit(node)
+
+    def visit_FunctionDef(self, node: Function) -> None:
+        if not isinstance(node, ast.Lambda):
+            self._bind(node.name, Binding(self.scope))
+        super().visit_FunctionDef(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_Lambda = visit_FunctionDef
+
+    def visit_ClassDef(self, node: ast.ClassDef) -> None:
+        self._bind(node.name, Binding(self.scope))
+        super().visit_ClassDef(node)
+
+    # PRIVATE
+
+    def _enter(self, node: ast.AST, parent: Scope | None) -> Scope:
+        scope = Scope(parent, is_class=isinstance(node, ast.ClassDef))
+        self.scopes[node] = scope
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda)):
+            return scope
+        args = node.args
+        for arg in _get_args(args):
+            self._bind(arg.arg, Binding(scope, annotation=arg.annotation), scope)
+        # `*args: Locale` means a tuple of locales
+        for star_arg in (args.vararg, args.kwarg):
+            if star_arg is not None:
+                self._bind(star_arg.arg, Binding(scope), scope)
+        positional = [*getattr(args, 'posonlyargs', []), *args.args]
+        if parent is not None and parent.is_class and positional:
+            if not isinstance(node, ast.Lambda) and not _is_static(node):
+                scope.self_name = positional[0].arg
+        return scope
+
+    def _assign(self, target: ast.expr, binding: Binding) -> None:
+        if isinstance(target, ast.Name):
+            self._bind(target.id, binding)
+            return
+        # self.attr = ...
+        if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name):
+            self_name = target.value.id
+            scope = self.scope.lookup(self_name)
+            if scope is not None and scope.self_name == self_name:
+                assert scope.parent is not None
+                scope.parent.attrs[target.attr].append(binding)
+        if isinstance(target, (ast.Tuple, ast.List)):
+            for elt in target.elts:
+                self._assign(elt, Binding(self.scope))
+            return
+        if isinstance(target, ast.Starred):
+            self._assign(target.value, Binding(self.scope))
+            return
+        self.visit(target)
+
+    def _bind(self, name: str, binding: Binding, scope: Scope | None = None) -> None:
+        if scope is None:
+            scope = self.scope
+        if name in scope.globals:
+            scope = scope.root
+        elif name in scope.nonlocals:
+            parent = scope.parent
+            while parent is not None and parent.is_class:
+                parent = parent.parent
+            if parent is not None:
+                scope = parent
+        scope.bindings[name].append(binding)
+
+
+class Visitor(ScopeVisitor):
+    """Find messages in the tree using the scopes found by `Binder`.
+    """
+    def __init__(
+        self,
+        file_name: str,
+        names: frozenset[str],
+        scopes: dict[ast.AST, Scope],
+    ) -> None:
+        self.file_name = file_name
+        self.names = names
+        self.scopes = scopes
+        self.messages: list[Message] = []
+        self.ambiguous = False
+        # The kinds of values of names and attributes, by the scope and the name.
+        self._kinds: dict[tuple[int, str], str | None] = {}
+
+    def visit_Call(self, node: ast.Call) -> None:
+        self.generic_visit(node)
+        func = node.func
+        # get(...)
+        if isinstance(func, ast.Name):
+            kind = self._kind(func, self.scope)
+        # loc.get(...) or l10n.get(...)
+        elif isinstance(func, ast.Attribute) and func.attr == 'get':
+            kind = self._kind(func.value, self.scope)
+            if kind in (LOCALE, MODULE):
+                kind = GET
+        else:
+            return
+        if kind == GET:
+            self._record(node)
+        elif kind == AMBIGUOUS:
+            self.ambiguous = True
+
+    # PRIVATE
+
+    def _enter(self, node: ast.AST, parent: Scope | None) -> Scope:
+        return self.scopes[node]
+
+    def _kind(self, node: ast.expr, scope: Scope) -> str | None:
+        """What the expression evaluates to, one of the kinds or None for anything else.
+        """
+        if isinstance(node, ast.Name):
+            if node.id in self.names:
+                return LOCALE
+            target = scope.lookup(node.id)
+            if target is None:
+                return None
+            return self._combine(target, node.id, target.bindings[node.id])
+        if isinstance(node, ast.Attribute):
+            return self._attr_kind(node, scope)
+        if isinstance(node, ast.Call):
+            func = node.func
+            # locales.get('en') or locales.get_cached('en')
+            if isinstance(func, ast.Attribute) and func.attr in ('get', 'get_cached'):
+                kind = self._kind(func.value, scope)
+                if kind == LOCALES:
+                    return LOCALE
+                if kind == AMBIGUOUS:
+                    return AMBIGUOUS
+            # Locale(...) or Locales(...)
+            return _instance_of(self._kind(func, scope))
+        # locales['en']
+        if isinstance(node, ast.Subscript):
+            kind = self._kind(node.value, scope)
+            if kind == LOCALES:
+                return LOCALE
+            if kind == AMBIGUOUS:
+                return AMBIGUOUS
+        return None
+
+    def _attr_kind(self, node: ast.Attribute, scope: Scope) -> str | None:
+        receiver = node.value
+        if self._kind(receiver, scope) == MODULE:
+            return IMPORTS['l10n'].get(node.attr)
+        if node.attr in self.names:
+            return LOCALE
+        # self.attr
+        if isinstance(receiver, ast.Name):
+            target = scope.lookup(receiver.id)
+            if target is not None and target.self_name == receiver.id:
+                assert target.parent is not None
+                cls = target.parent
+                if node.attr in cls.attrs or node.attr in cls.bindings:
+                    return self._class_attr_kind(cls, node.attr)
+        # The attribute can be assigned in a parent class or outside of the file,
+        # so only mypy can tell what it is.
+        for cls in self.scopes.values():
+            if cls.is_class and self._class_attr_kind(cls, node.attr) is not None:
+                return AMBIGUOUS
+        return None
+
+    def _class_attr_kind(self, cls: Scope, attr: str) -> str | None:
+        bindings = [*cls.attrs.get(attr, ()), *cls.bindings.get(attr, ())]
+        return self._combine(cls, '.' + attr, bindings)
+
+    def _combine(self, scope: Scope, name: str, bindings: list[Binding]) -> str | None:
+        """The kind of the name that has all the given values assigned.
+
+        If the values are of different kinds, the name is ambiguous.
+        """
+        key = (id(scope), name)
+        if key in self._kinds:
+            return self._kinds[key]
+        # A value that refers to the name itself is not a locale.
+        self._kinds[key] = None
+        kinds = {self._binding_kind(binding) for binding in bindings}
+        kind = None
+        if len(kinds) == 1:
+            kind = kinds.pop()
+        elif len(kinds) > 1:
+            kind = AMBIGUOUS
+        self._kinds[key] = kind
+        return kind
+
+    def _binding_kind(self, binding: Binding) -> str | None:
+        if binding.annotation is not None:
+            return _instance_of(self._annotation_kind(binding.annotation, binding.scope))
+        if binding.value is not None:
+            return self._kind(binding.value, binding.scope)
+        return binding.kind
+
+    def _annotation_kind(self, node: ast.expr, scope: Scope) -> str | None:
+        # forward reference: 'Locale'
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            try:
+                node = ast.parse(node.value, mode='eval').body
+            except SyntaxError:
+                return None
+        return self._kind(node, scope)
+
+    def _record(self, node: ast.Call) -> None:
+        args: dict[str, ast.expr] = {}
+        if len(node.args) > len(ARGS):
+            self.ambiguous = True
+            return
+        for name, arg in zip(ARGS, node.args):
+            if isinstance(arg, ast.Starred):
+                self.ambiguous = True
+                return
+            args[name] = arg
+        for keyword in node.keywords:
+            if keyword.arg is None or keyword.arg not in KWARGS:
+                self.ambiguous = True
+                return
+            args[keyword.arg] = keyword.value
+
+        values: dict[str, Any] = {}
+        for name, arg in args.items():
+            value = arg.value if isinstance(arg, ast.Constant) else None
+            if name in STR_KWARGS and not isinstance(value, str):
+                # Non-literal values can be inferred only by mypy.
+                if not _is_none(arg):
+                    self.ambiguous = True
+                    return
+            values[name] = value
+        if not values.get('message'):
+            return
+        self.messages.append(Message(
+            text=values['message'],
+            line=node.lineno,
+            column=node.col_offset,
+            n=values.get('n'),
+            context=values.get('context'),
+            comment=values.get('comment'),
+            plural=values.get('plural'),
+            file_name=self.file_name,
+        ))
+
+
+def _is_none(node: ast.expr) -> bool:
+    return isinstance(node, ast.Constant) and node.value is None
+
+
+def _instance_of(kind: str | None) -> str | None:
+    """The kind of instances of the class of the given kind.
+    """
+    if kind == LOCALE_CLASS:
+        return LOCALE
+    if kind == LOCALES_CLASS:
+        return LOCALES
+    if kind == AMBIGUOUS:
+        return AMBIGUOUS
+    return None
+
+
+def _get_args(args: ast.arguments) -> list[ast.arg]:
+    return [*getattr(args, 'posonlyargs', []), *args.args, *args.kwonlyargs]
+
+
+def _is_static(node: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+    return any(
+        isinstance(d, ast.Name) and d.id == 'staticmethod'
+        for d in node.decorator_list
+    )
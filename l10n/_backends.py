@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+
+# Translations of a batch, None for each message if the batch has failed,
+# and the error of the last attempt.
+BatchResult = Tuple[Sequence[Optional[str]], Optional[Exception]]
+# Callback for each batch: the target language, translations, and the error.
+OnBatch = Callable[[str, Dict[str, Optional[str]], Optional[Exception]], None]
+
+
+class Backend(ABC):
+    """The base class for machine translation services used by `l10n translate`.
+
+    A custom backend can be passed into the command as `--backend module:Class`.
+    The class is instantiated without arguments.
+    """
+    # how many messages can be sent in one request
+    batch_size: int = 50
+
+    @abstractmethod
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        """Translate the messages from `src` language into `dest` language.
+
+        Must return translations in the same order as the messages.
+        An exception means that the whole batch has failed and should be retried.
+        """
+
+
+class GoogleBackend(Backend):
+    """Google Translate unofficial API provided by `googletrans` package.
+    """
+    def __init__(self) -> None:
+        try:
+            from googletrans import Translator
+        except ImportError:
+            msg = 'Please, run `python3 -m pip install googletrans==4.0.0rc1`'
+            raise ImportError(msg)
+        self._translator = Translator()
+
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        # googletrans is synchronous, so it's called in a thread
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(
+            None, lambda: self._translator.translate(list(texts), src=src, dest=dest),
+        )
+        return [r.text for r in results]
+
+
+BACKENDS = dict(
+    google=GoogleBackend,
+)
+
+
+def load_backend(name: str) -> Backend:
+    """Create the backend by its name or import path (`module:Class`).
+    """
+    backend_class = BACKENDS.get(name)
+    if backend_class is None:
+        if ':' not in name:
+            raise ValueError(f'unknown backend: {name}')
+        module_name, _, class_name = name.partition(':')
+        module = importlib.import_module(module_name)
+        backend_class = getattr(module, class_name)
+    return backend_class()
+
+
+@dataclass
+class BatchTranslator:
+    """Translate many messages using the backend, sending requests concurrently.
+
+    Args:
+        backend: the service to use for translations.
+        concurrency: how many requests can be in progress at the same time.
+        rate: how many requests per second can be started, 0 means no limit.
+        retries: how many times to retry a failed request.
+        backoff: seconds to wait before the first retry, doubled for each next one.
+    """
+    backend: Backend
+    concurrency: int = 4
+    rate: float = 0
+    retries: int = 3
+    backoff: float = 1
+
+    _last_request: float = field(default=float('-inf'), init=False)
+
+    async def translate(
+        self,
+        messages: Mapping[str, Iterable[str]], *,
+        src: str,
+        on_batch: OnBatch | None = None,
+    ) -> dict[str, dict[str, str | None]]:
+        """Translate messages into multiple languages.
+
+        Args:
+            messages: the messages to translate for each target language.
+                Each unique message is sent only once per language.
+            src: the language of the messages.
+            on_batch: called with the target language, translations,
+                and the error if the batch has failed, as soon as each batch
+                is done. Allows to save the progress and report failures.
+
+        Returns a mapping of messages to their translations for each language.
+        The translation is None if the request for it has failed after all retries.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        lock = asyncio.Lock()
+        size = max(1, self.backend.batch_size)
+        batches = []
+        for dest, texts in messages.items():
+            unique = list(dict.fromkeys(texts))
+            for i in range(0, len(unique), size):
+                batches.append((dest, unique[i:i + size]))
+        translate = partial(self._translate_batch, src=src, semaphore=semaphore, lock=lock)
+
+        async def run_batch(dest: str, batch: list[str]) -> Sequence[str | None]:
+            translations, error = await translate(batch, dest=dest)
+            if on_batch is not None:
+                on_batch(dest, dict(zip(batch, translations)), error)
+            return translations
+
+        tasks = [run_batch(dest, batch) for dest, batch in batches]
+        result: dict[str, dict[str, str | None]] = {dest: {} for dest in messages}
+        for (dest, batch), translations in zip(batches, await asyncio.gather(*tasks)):
+            result[dest].update(zip(batch, translations))
+        return result
+
+    # PRIVATE
+
+    async def _translate_batch(
+        self,
+        batch: list[str], *,
+        src: str,
+        dest: str,
+        semaphore: asyncio.Semaphore,
+        lock: asyncio.Lock,
+    ) -> BatchResult:
+        error: Exception | None = None
+        async with semaphore:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    await asyncio.sleep(self.backoff * 2 ** (attempt - 1))
+                await self._wait_for_rate_limit(lock)
+                try:
+                    translations = await self.backend.translate_batch(
+                        batch, src=src, dest=dest,
+                    )
+                except Exception as exc:
+                    error = exc
+                    continue
+                if len(translations) == len(batch):
+                    return translations, None
+                error = ValueError(
+                    f'expected {len(batch)} translations, got {len(translations)}',
+                )
+        return [None] * len(batch), error
+
+    async def _wait_for_rate_limit(self, lock: asyncio.Lock) -> None:
+        """Make sure requests are started not more often than `rate` per second.
+        """
+        if not self.rate:
+            return
+        loop = asyncio.get_running_loop()
+        async with lock:
+            delay = self._last_request + 1 / self.rate - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._last_request = loop.time()
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import struct
+from functools import cached_property
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Hashable, Iterable
+
+from ._locale import Locale
+
+
+MAGIC = b'L10NBNDL'
+VERSION = 1
+# magic, version, and the size of the JSON header
+PREFIX = struct.Struct('<8sII')
+
+
+def write_bundle(path: Path, parts: Iterable[tuple[str, bytes]]) -> None:
+    """Write MO files for all languages into one bundle file.
+
+    The file starts with a JSON directory that has for each language
+    the offset and the size of its MO file and its plural rules.
+    The MO files follow the directory, one after another.
+
+    Args:
+        path: where to write the bundle.
+        parts: language names and content of their MO files.
+    """
+    import json
+    languages = {}
+    offset = 0
+    contents = []
+    for language, content in sorted(parts):
+        languages[language] = dict(
+            offset=offset,
+            size=len(content),
+            plural_forms=read_plural_forms(content),
+        )
+        offset += len(content)
+        contents.append(content)
+    header = json.dumps(dict(languages=languages), sort_keys=True).encode('utf8')
+    with path.open('wb') as stream:
+        stream.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+        stream.write(header)
+        for content in contents:
+            stream.write(content)
+
+
+def read_plural_forms(content: bytes) -> str | None:
+    """Get the `Plural-Forms` header from the content of MO file.
+    """
+    _, _, count, keys_start, values_start = struct.unpack_from('<5I', content)
+    if not count:
+        return None
+    # keys are sorted, so the header (empty key) is always the first one
+    key_len, _ = struct.unpack_from('<2I', content, keys_start)
+    if key_len:
+        return None
+    value_len, value_offset = struct.unpack_from('<2I', content, values_start)
+    header = content[value_offset:value_offset + value_len]
+    for line in header.decode('utf8', errors='replace').splitlines():
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'plural-forms':
+            return value.strip()
+    return None
+
+
+def is_bundle(path: Path) -> bool:
+    """Check if the given path is a bundle file written by `write_bundle`.
+    """
+    try:
+        with path.open('rb') as stream:
+            return stream.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+class Bundle:
+    """A single file containing compiled MO files for multiple languages.
+
+    Only the directory is read when the bundle is opened. The MO file
+    for a language is read from the disk when the language is requested.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+
+    @cached_property
+    def languages(self) -> frozenset[str]:
+        """All languages included into the bundle.
+        """
+        return frozenset(self._directory)
+
+    @property
+    def locales(self) -> tuple[BundledLocale, ...]:
+        """Locales for all languages included into the bundle.
+        """
+        return tuple(
+            BundledLocale(self, name=name, language=name)
+            for name in sorted(self._directory)
+        )
+
+    def plural_forms(self, language: str) -> str | None:
+        """The `Plural-Forms` header of the MO file for the language.
+        """
+        return self._directory[language]['plural_forms']
+
+    def read(self, language: str) -> bytes:
+        """Read the content of the MO file for the language.
+        """
+        info = self._directory[language]
+        with self.path.open('rb') as stream:
+            stream.seek(self._data_start + info['offset'])
+            return stream.read(info['size'])
+
+    def get(self, name: str, *, language: str | None = None) -> BundledLocale | None:
+        """Get locale for the language if it is included into the bundle.
+
+        Args:
+            name: the language under which the MO file is stored in the bundle.
+            language: the language of the returned locale, `name` by default.
+        """
+        if name not in self._directory:
+            return None
+        return BundledLocale(self, name=name, language=language or name)
+
+    # PRIVATE
+
+    @cached_property
+    def _header(self) -> tuple[int, dict[str, dict]]:
+        import json
+        with self.path.open('rb') as stream:
+            magic, version, size = PREFIX.unpack(stream.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f'{self.path} is not a bundle')
+            if version != VERSION:
+                raise ValueError(f'unsupported bundle version: {version}')
+            header = json.loads(stream.read(size).decode('utf8'))
+        return PREFIX.size + size, header['languages']
+
+    @property
+    def _data_start(self) -> int:
+        return self._header[0]
+
+    @property
+    def _directory(self) -> dict[str, dict]:
+        return self._header[1]
+
+
+class BundledLocale(Locale):
+    """Locale that reads its MO file from a bundle.
+    """
+    def __init__(self, bundle: Bundle, *, name: str, language: str) -> None:
+        super().__init__(bundle.path, language=language)
+        self._bundle = bundle
+        self._name = name
+
+    def reset_cache(self) -> None:
+        bundle = self._bundle
+        name = self._name
+        super().reset_cache()
+        self._bundle = bundle
+        self._name = name
+
+    def _open(self) -> BinaryIO:
+        return BytesIO(self._bundle.read(self._name))
+
+    def _identity(self) -> Hashable:
+        return ('bundle', self.path, self._name)
+
+    def _catalog_key(self) -> Hashable:
+        return (super()._catalog_key(), self._name)
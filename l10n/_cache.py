@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Callable, Collection, Iterable, Iterator
+
+from ._message import Message
+from ._sources import get_file_name
+
+
+VERSION = 2
+
+
+def hash_file(path: Path) -> str | None:
+    try:
+        content = path.read_bytes()
+    except OSError:
+        return None
+    return hashlib.sha256(content).hexdigest()
+
+
+class MessageCache:
+    """Messages extracted from each source file, keyed by the file content hash.
+
+    Allows to analyze only files that have changed since the previous run.
+    The key identifies the extractor that found the messages. If it doesn't match,
+    the whole cache is discarded.
+    """
+    def __init__(self, path: Path, *, key: str) -> None:
+        self.path = path
+        self.key = key
+        self.files: dict[str, tuple[str, list[Message]]] = {}
+        self.valid = False
+
+    def load(self) -> None:
+        """Read the cache from the disk.
+
+        The cache is considered invalid if it doesn't exist or
+        was produced by a different version of the extractor.
+        """
+        try:
+            raw = json.loads(self.path.read_text(encoding='utf8'))
+        except (OSError, ValueError):
+            return
+        if raw.get('version') != VERSION or raw.get('key') != self.key:
+            return
+        for file_name, (digest, messages) in raw['files'].items():
+            self.files[file_name] = (digest, [Message(**m) for m in messages])
+        self.valid = True
+
+    def save(self) -> None:
+        raw = dict(
+            version=VERSION,
+            key=self.key,
+            files={
+                file_name: (digest, [m._asdict() for m in messages])
+                for file_name, (digest, messages) in sorted(self.files.items())
+            },
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(json.dumps(raw), encoding='utf8')
+
+    def invalidate(self) -> None:
+        """Remove the cache from the disk.
+
+        Call it before the extraction, so that if it gets interrupted,
+        the next run doesn't use the outdated cache.
+        """
+        self.path.unlink(missing_ok=True)
+
+    def discard(self, file_names: Iterable[str]) -> None:
+        """Remove the given files from the cache, so they are analyzed on the next run.
+        """
+        for file_name in file_names:
+            self.files.pop(file_name, None)
+
+    def extract(
+        self,
+        paths: Iterable[Path],
+        extract: Callable[[list[Path]], Iterable[Message]],
+    ) -> Iterator[Message]:
+        """Yield messages from all the given files, analyzing only changed ones.
+
+        Files that are not in the given list anymore (deleted or renamed)
+        are removed from the cache.
+        """
+        digests = _hash_files(paths)
+        changed = {
+            file_name for file_name, digest in digests.items()
+            if digest is not None and self._get_digest(file_name) != digest
+        }
+        messages: Iterable[Message] = ()
+        if changed:
+            messages = extract([Path(file_name) for file_name in sorted(changed)])
+        yield from self._update(digests, messages, changed)
+
+    def replay(
+        self,
+        paths: Iterable[Path],
+        messages: Iterable[Message],
+        analyzed: Collection[str],
+    ) -> Iterator[Message]:
+        """Yield the given messages and cached messages from files that weren't analyzed.
+
+        It's for extractors that decide on their own which files to analyze,
+        like mypy in incremental mode. The extractor may fill `analyzed`
+        while producing messages, it's checked only when all of them are consumed.
+        """
+        yield from self._update(_hash_files(paths), messages, analyzed)
+
+    def _update(
+        self,
+        digests: dict[str, str | None],
+        messages: Iterable[Message],
+        analyzed: Collection[str],
+    ) -> Iterator[Message]:
+        fresh: dict[str, list[Message]] = {}
+        for msg in messages:
+            fresh.setdefault(msg.file_name, []).append(msg)
+            yield msg
+
+        files = {}
+        for file_name, digest in digests.items():
+            if digest is None:
+                continue
+            cached = self.files.get(file_name)
+            if cached is None or file_name in analyzed:
+                files[file_name] = (digest, fresh.get(file_name, []))
+                continue
+            files[file_name] = (digest, cached[1])
+            yield from cached[1]
+        self.files = files
+
+    def _get_digest(self, file_name: str) -> str | None:
+        cached = self.files.get(file_name)
+        if cached is None:
+            return None
+        return cached[0]
+
+
+def _hash_files(paths: Iterable[Path]) -> dict[str, str | None]:
+    return {get_file_name(path): hash_file(path) for path in paths}
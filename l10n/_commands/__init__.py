@@ -5,6 +5,7 @@ from typing import Mapping, Type
 from ._base import Command
 from ._compile import Compile
 from ._extract import Extract
+from ._stats import Stats
 from ._translate import Translate
 
 
@@ -12,5 +13,6 @@ COMMANDS: Mapping[str, Type[Command]]
 COMMANDS = MappingProxyType(dict(
     compile=Compile,
     extract=Extract,
+    stats=Stats,
     translate=Translate,
 ))
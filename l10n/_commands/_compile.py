@@ -1,14 +1,27 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
+from typing import Any, Callable, Iterator, TypeVar
 
-import polib
+import l10n
 
+from .._bundle import write_bundle
+from .._cache import hash_file
+from .._extractor import extract_messages
+from .._mo import Compiled, MessageID, build_mo
 from .._project import Project, find_project_root
+from .._workspace import Workspace
 from ._base import Command
 
 
+T = TypeVar('T')
+
+
 class Compile(Command):
     """Generate `.mo` files out of `.po` files.
     """
@@ -26,32 +39,256 @@ class Compile(Command):
             '--allow-empty', action='store_true',
             help='allow emitting `.mo` for untranslated `.po` files',
         )
+        parser.add_argument(
+            '--jobs', default=1, type=int,
+            help='how many files to compile in parallel',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='compile all files, even if they are up to date',
+        )
+        parser.add_argument(
+            '--hash-table', action='store_true',
+            help='include the GNU gettext hash table into `.mo` files',
+        )
+        parser.add_argument(
+            '--bundle', action='store_true',
+            help='write all languages into one bundle file instead of `.mo` files',
+        )
+        parser.add_argument(
+            '--workspace', action='store_true',
+            help='compile all projects (with `pyproject.toml`) inside of the path',
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='leave out translations for messages not used in the code anymore',
+        )
 
     def run(self) -> int:
-        project_root = find_project_root(self.args.path)
-        project = Project(project_root)
-        project.mo_root.mkdir(exist_ok=True)
+        if not self.args.workspace:
+            return self._compile_project(Project(find_project_root(self.args.path)))
         code = 0
-        for po_path in project.po_root.iterdir():
-            if po_path.suffix != '.po':
+        for project in Workspace(self.args.path).projects:
+            self.print(f'{project.name}:')
+            code += self._compile_project(project)
+        return code
+
+    def _compile_project(self, project: Project) -> int:
+        manifest_path = project.cache_root / 'compile.json'
+        old_manifest = _read_manifest(manifest_path)
+        options: dict[str, Any] = dict(
+            no_fuzzy=self.args.no_fuzzy,
+            allow_empty=self.args.allow_empty,
+            hash_table=self.args.hash_table,
+        )
+        keep = None
+        if self.args.prune:
+            keep = self._find_used_messages(project)
+            if keep is None:
+                self.print('no messages found in the code, nothing will be pruned')
+            else:
+                # the output depends on the code, not only on the PO file
+                options['prune'] = _hash_messages(keep)
+        po_paths = sorted(p for p in project.po_root.iterdir() if p.suffix == '.po')
+        if self.args.bundle:
+            manifest = dict(old_manifest)
+            code = self._compile_bundle(project, po_paths, options, manifest, keep)
+            _write_manifest(manifest_path, manifest)
+            return code
+
+        project.mo_root.mkdir(exist_ok=True)
+        manifest = {}
+        records = {}
+        outdated = []
+        for po_path in po_paths:
+            mo_path = project.mo_root / f'{po_path.stem}.mo'
+            # skip the file if neither the source nor the options have changed
+            record = dict(
+                source=hash_file(po_path),
+                options=options,
+                version=l10n.__version__,
+            )
+            old_record = old_manifest.get(mo_path.name, {})
+            if not self.args.force and _is_up_to_date(old_record, record, mo_path):
+                manifest[mo_path.name] = old_record
                 continue
+            records[po_path] = record
+            outdated.append(po_path)
+        results = dict(zip(outdated, self._compile_all(project, outdated, keep)))
+
+        code = 0
+        for po_path in po_paths:
             self.print(po_path.stem)
-            po_file = polib.pofile(str(po_path))
+            if po_path not in results:
+                self.print('  skipped: up to date')
+                continue
+            compiled = results[po_path]
+            if compiled is None:
+                self.print('  no translated strings found')
+                code += 1
+                continue
+            self._print_compiled(compiled)
+            mo_path = project.mo_root / f'{po_path.stem}.mo'
+            manifest[mo_path.name] = dict(records[po_path], output=hash_file(mo_path))
+        _write_manifest(manifest_path, manifest)
+        return code
 
-            # remove `fuzzy` flag from all entries unless `--no-fuzzy` is set.
-            if not self.args.no_fuzzy:
-                for entry in po_file:
-                    if entry.fuzzy:
-                        entry.flags.remove('fuzzy')
+    def _compile_bundle(
+        self,
+        project: Project,
+        po_paths: list[Path],
+        options: dict[str, Any],
+        manifest: dict[str, dict[str, Any]],
+        keep: frozenset[MessageID] | None,
+    ) -> int:
+        """Compile all PO files into one bundle file.
 
-            # check if there is at least one translated entry
-            translated = sum(e.translated() for e in po_file)
-            if not self.args.allow_empty and not translated:
+        The bundle is rebuilt if any of the PO files has changed.
+        """
+        bundle_path = project.bundle_path
+        record = dict(
+            sources={p.stem: hash_file(p) for p in po_paths},
+            options=options,
+            version=l10n.__version__,
+        )
+        old_record = manifest.pop(bundle_path.name, {})
+        if not self.args.force and _is_up_to_date(old_record, record, bundle_path):
+            manifest[bundle_path.name] = old_record
+            for po_path in po_paths:
+                self.print(po_path.stem)
+                self.print('  skipped: up to date')
+            return 0
+
+        build = partial(
+            build_mo,
+            fuzzy=not self.args.no_fuzzy,
+            allow_empty=self.args.allow_empty,
+            hash_table=self.args.hash_table,
+            keep=keep,
+        )
+        code = 0
+        parts = []
+        for po_path, result in zip(po_paths, self._map(build, po_paths)):
+            self.print(po_path.stem)
+            if result is None:
                 self.print('  no translated strings found')
                 code += 1
                 continue
-            self.print(f'  included: {translated}')
-
-            mo_path = project.mo_root / f'{po_path.stem}.mo'
-            po_file.save_as_mofile(str(mo_path))
+            compiled, content = result
+            self._print_compiled(compiled)
+            parts.append((po_path.stem, content))
+        bundle_path.parent.mkdir(parents=True, exist_ok=True)
+        write_bundle(bundle_path, parts)
+        # languages without translations must be reported on the next run too
+        if not code:
+            manifest[bundle_path.name] = dict(record, output=hash_file(bundle_path))
         return code
+
+    def _compile_all(
+        self,
+        project: Project,
+        po_paths: list[Path],
+        keep: frozenset[MessageID] | None,
+    ) -> Iterator[Compiled | None]:
+        """Compile the given files into `.mo` files.
+        """
+        mo_paths = [project.mo_root / f'{p.stem}.mo' for p in po_paths]
+        compile = partial(
+            compile_file,
+            no_fuzzy=self.args.no_fuzzy,
+            allow_empty=self.args.allow_empty,
+            hash_table=self.args.hash_table,
+            keep=keep,
+        )
+        yield from self._map(compile, po_paths, mo_paths)
+
+    def _find_used_messages(self, project: Project) -> frozenset[MessageID] | None:
+        """Find messages used in the code of the project, for `--prune`.
+
+        A message missed here is dropped from the output, so the whole project
+        is analyzed in one mypy run, without shards and caches, to make sure
+        constants imported from other files are known.
+        """
+        messages = extract_messages(project.root)
+        used = frozenset((msg.context, msg.text) for msg in messages)
+        # Most likely, the analysis has failed. Better not prune anything.
+        if not used:
+            return None
+        return used
+
+    def _print_compiled(self, compiled: Compiled) -> None:
+        self.print(f'  included: {compiled.translated}')
+        if self.args.prune:
+            self.print(f'  pruned: {compiled.pruned} ({compiled.saved} bytes saved)')
+
+    def _map(self, func: Callable[..., T], *args: list[Path]) -> Iterator[T]:
+        """Call the function for each set of arguments.
+
+        The calls are made in parallel processes if `--jobs` is specified.
+        """
+        jobs = min(self.args.jobs, len(args[0]))
+        if jobs <= 1:
+            yield from map(func, *args)
+            return
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            yield from executor.map(func, *args)
+
+
+def compile_file(
+    po_path: Path,
+    mo_path: Path, *,
+    no_fuzzy: bool,
+    allow_empty: bool,
+    hash_table: bool = False,
+    keep: frozenset[MessageID] | None = None,
+) -> Compiled | None:
+    """Compile the PO file into the MO file.
+
+    Returns how many entries are included and pruned or None if there are
+    no translations (and so the file isn't compiled).
+    """
+    result = build_mo(
+        po_path,
+        fuzzy=not no_fuzzy,
+        allow_empty=allow_empty,
+        hash_table=hash_table,
+        keep=keep,
+    )
+    if result is None:
+        return None
+    compiled, content = result
+    mo_path.write_bytes(content)
+    return compiled
+
+
+def _hash_messages(messages: frozenset[MessageID]) -> str:
+    """Get a digest of the messages that doesn't depend on their order.
+    """
+    raw = json.dumps(sorted(messages, key=lambda m: (m[0] or '', m[1], m[0] is None)))
+    return hashlib.sha256(raw.encode('utf8')).hexdigest()
+
+
+def _is_up_to_date(
+    old_record: dict[str, Any],
+    record: dict[str, Any],
+    mo_path: Path,
+) -> bool:
+    if not old_record:
+        return False
+    if old_record.get('output') != hash_file(mo_path):
+        return False
+    return dict(old_record, output=None) == dict(record, output=None)
+
+
+def _read_manifest(path: Path) -> dict[str, dict[str, Any]]:
+    """Read the information about previously compiled files.
+    """
+    try:
+        return json.loads(path.read_text(encoding='utf8'))
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_manifest(path: Path, manifest: dict[str, dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf8')
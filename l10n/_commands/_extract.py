@@ -1,18 +1,30 @@
 from __future__ import annotations
 
+import pickle
+import time
 from argparse import ArgumentParser
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timezone
+from functools import cached_property
+from itertools import chain
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Iterator
+from typing import Any, Iterable, Iterator, NamedTuple
 
 import polib
 
 import l10n
 
-from .._extractor import Message, extract_messages
+from .._ast_extractor import extract_messages_ast
+from .._cache import MessageCache
+from .._extractor import Message, extract_files, extract_messages
+from .._merge import merge_catalog, merge_duplicates
 from .._plurals import GERMANIC, PLURALS
 from .._project import Project, find_project_root
+from .._sources import find_sources, get_file_name
+from .._workspace import Workspace
 from ._base import Command
 
 
@@ -39,7 +51,36 @@ class Extract(Command):
         )
         parser.add_argument(
             '--allow-duplicates', action='store_true',
-            help='do not check the file for duplicates',
+            help='do not check the existing PO file for duplicates',
+        )
+        parser.add_argument(
+            '--check', action='store_true',
+            help='do not write anything, fail if PO files are outdated',
+        )
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help='cache analysis results in the project to speed up next runs',
+        )
+        parser.add_argument(
+            '--engine', choices=('mypy', 'ast'), default='mypy',
+            help='how to find messages: type inference or just syntax analysis',
+        )
+        parser.add_argument(
+            '--jobs', default=1, type=int,
+            help='how many processes to use for analyzing code and updating PO files',
+        )
+        parser.add_argument(
+            '--in-process', action='store_true',
+            help='run mypy in the same process instead of a subprocess',
+        )
+        parser.add_argument(
+            '--watch', action='store_true',
+            help='keep running and update PO files when source files change, '
+            'implies --incremental',
+        )
+        parser.add_argument(
+            '--interval', default=1.0, type=float,
+            help='how often (in seconds) to check for changes in watch mode',
         )
         now = datetime.now(timezone.utc).astimezone()
         parser.add_argument(
@@ -48,50 +89,180 @@ class Extract(Command):
         )
 
     def run(self) -> int:
+        cache_dir = None
+        # Watch mode analyzes the project on each change,
+        # so it always keeps the cache to not start from scratch each time.
+        if self.args.incremental or self.args.watch:
+            cache_dir = Project(find_project_root(self.args.path)).cache_root
+        if self.args.watch:
+            return self._watch(cache_dir)
+        return self._write(self._extract(cache_dir))
+
+    def _extract(self, cache_dir: Path | None) -> Iterable[Message]:
+        if self.args.engine == 'ast':
+            return self._extract_ast(cache_dir)
+        return extract_messages(
+            self.args.path,
+            cache_dir=cache_dir,
+            jobs=self.args.jobs,
+            in_process=self.args.in_process,
+        )
+
+    def _watch(self, cache_dir: Path | None) -> int:
+        """Extract messages again each time source files change, until interrupted.
+
+        The whole project is passed to the extractor each time because a change
+        in one file can change messages in another one, like when a `Final` constant
+        is edited. The cache is always used, so only changed files and files
+        that depend on them are actually analyzed.
+        """
+        try:
+            snapshot = _snapshot(self.args.path)
+            self._rewrite(cache_dir)
+            self.print('watching for changes...')
+            while True:
+                time.sleep(self.args.interval)
+                new_snapshot = _snapshot(self.args.path)
+                if new_snapshot == snapshot:
+                    continue
+                snapshot = new_snapshot
+                self._rewrite(cache_dir)
+        except KeyboardInterrupt:
+            return 0
+
+    def _rewrite(self, cache_dir: Path | None) -> None:
+        try:
+            self._write(self._extract(cache_dir))
+        except RuntimeError as exc:
+            # Mypy has failed, most probably on a file that is being edited.
+            # Keep watching, the next change may fix it.
+            self.print(str(exc))
+        except Exception as exc:
+            # Whatever has failed, the watcher must survive it.
+            self.print(f'extraction failed: {type(exc).__name__}: {exc}')
+
+    def _extract_ast(self, cache_dir: Path | None) -> Iterable[Message]:
+        project = Project(find_project_root(self.args.path))
+        ambiguous: list[Path] = []
+
+        def extract(paths: list[Path]) -> list[Message]:
+            result = extract_messages_ast(
+                paths,
+                names=project.locale_names,
+                jobs=self.args.jobs,
+            )
+            ambiguous.extend(result.ambiguous)
+            return result.messages
+
+        sources = find_sources(self.args.path)
+        messages: Iterable[Message]
+        if cache_dir is None:
+            messages = extract(list(sources))
+        else:
+            cache = MessageCache(cache_dir / 'messages-ast.json', key=f'ast {l10n.__version__}')
+            cache.load()
+            messages = list(cache.extract(sources, extract))
+            # Messages in ambiguous files depend on other files,
+            # so they must be analyzed by mypy on each run.
+            cache.discard(get_file_name(path) for path in ambiguous)
+            cache.save()
+        if not ambiguous:
+            return messages
+        # Mypy follows imports to know constants defined in other files,
+        # and messages found in the imported files are already known.
+        file_names = {get_file_name(path) for path in ambiguous}
+        found = extract_files(
+            ambiguous,
+            follow_imports=True,
+            in_process=self.args.in_process,
+        )
+        return chain(messages, (msg for msg in found if msg.file_name in file_names))
+
+    def _write(self, messages: Iterable[Message]) -> int:
+        # Entries are built while mypy is still looking for more messages.
+        found = []
+        for msg in messages:
+            entry = self._msg_to_entry(msg)
+            root = self._workspace.find_root(msg.path)
+            found.append((_msg_position(msg), root, entry))
+        # The order in which mypy finds messages depends on the import graph
+        # and on how the project is split into shards.
+        found.sort(key=itemgetter(0))
         files: defaultdict[Path, list[polib.POEntry]]
         files = defaultdict(list)
-        for msg in extract_messages(self.args.path):
-            entry = self._msg_to_entry(msg)
-            root = find_project_root(msg.path)
+        for _, root, entry in found:
             files[root].append(entry)
 
         if not files:
             self.print('No entries found')
             return 1
+        updater = Updater(
+            wrap=self.args.wrap,
+            check_for_duplicates=not self.args.allow_duplicates,
+            now=datetime.fromisoformat(self.args.now).strftime('%F %H:%M%z'),
+            write=not self.args.check,
+        )
+        code = 0
         for root, entries in files.items():
-            project = Project(root)
-            project.po_root.mkdir(exist_ok=True)
-            for lang in self._langs_for(project):
+            project = self._workspace.get_project(root)
+            if not self.args.check:
+                project.po_root.mkdir(exist_ok=True)
+            template = merge_duplicates(entries)
+            langs = list(self._langs_for(project))
+            for lang, result in self._update(updater, project, langs, template):
                 self.print(lang)
-                file_path = project.po_root / f'{lang}.po'
-
-                template_file = polib.POFile(
-                    wrapwidth=self.args.wrap,
-                    check_for_duplicates=not self.args.allow_duplicates,
-                )
-                template_file.extend(entries)
-                if file_path.exists():
-                    target_file = polib.pofile(
-                        str(file_path),
-                        wrapwidth=self.args.wrap,
-                        check_for_duplicates=not self.args.allow_duplicates,
-                    )
-                    target_file.merge(template_file)
-                else:
-                    target_file = template_file
-                self._set_meta(project, target_file, lang)
-                target_file.save(str(file_path))
-                self.print(f'  extracted: {len(entries)}')
-        return 0
+                self.print(f'  extracted: {len(template)}')
+                if not result.changed:
+                    self.print('  up to date')
+                elif self.args.check:
+                    self.print('  outdated')
+                    code = 1
+                self.print(f'  time: {result.duration:.2f}s')
+        return code
+
+    @cached_property
+    def _workspace(self) -> Workspace:
+        return Workspace(self.args.path)
+
+    def _update(
+        self,
+        updater: Updater,
+        project: Project,
+        langs: list[str],
+        template: list[polib.POEntry],
+    ) -> Iterator[tuple[str, UpdateResult]]:
+        """Update PO files for all the given languages.
+
+        If `--jobs` is specified, each language is processed in a separate process.
+        """
+        jobs = min(self.args.jobs, len(langs))
+        if jobs <= 1:
+            for lang in langs:
+                yield lang, updater.update(project, lang, template)
+            return
+        # Serialize the template only once and send it to each worker only once.
+        payload = pickle.dumps(template)
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(payload,),
+        ) as executor:
+            results = executor.map(
+                _update_in_worker,
+                [updater] * len(langs), [project] * len(langs), langs,
+            )
+            yield from zip(langs, results)
 
     def _langs_for(self, project: Project) -> Iterator[str]:
         if self.args.lang:
             yield self.args.lang
             return
         found = False
-        for po_file in project.po_root.iterdir():
-            found = True
-            yield po_file.stem
+        # In check mode, the directory isn't created if it doesn't exist.
+        if project.po_root.is_dir():
+            for po_file in project.po_root.iterdir():
+                found = True
+                yield po_file.stem
         if not found:
             yield 'en'
 
@@ -114,16 +285,72 @@ class Extract(Command):
             **kwargs,
         )
 
+
+class UpdateResult(NamedTuple):
+    changed: bool
+    duration: float
+
+
+@dataclass(frozen=True)
+class Updater:
+    """Update PO files with extracted entries.
+
+    All the settings are stored in the object, so it can be sent into
+    a worker process.
+    """
+    wrap: int
+    check_for_duplicates: bool
+    now: str
+    write: bool = True
+
+    def update(
+        self,
+        project: Project,
+        lang: str,
+        template: list[polib.POEntry],
+    ) -> UpdateResult:
+        """Update the PO file for the given language.
+
+        The file is written only if anything besides the revision date changed.
+        """
+        start = time.perf_counter()
+        file_path = project.po_root / f'{lang}.po'
+        old_content = None
+        if file_path.exists():
+            # The duplicates check is done by `merge_catalog` in linear time.
+            target_file = polib.pofile(
+                str(file_path),
+                wrapwidth=self.wrap,
+                check_for_duplicates=False,
+            )
+            old_content = file_path.read_text(encoding=target_file.encoding)
+        else:
+            target_file = polib.POFile(wrapwidth=self.wrap)
+        merge_catalog(
+            target_file, template,
+            check_for_duplicates=self.check_for_duplicates,
+        )
+        old_revision = target_file.metadata.get('PO-Revision-Date')
+        self._set_meta(project, target_file, lang)
+
+        changed = True
+        if old_content is not None and old_revision is not None:
+            target_file.metadata['PO-Revision-Date'] = old_revision
+            changed = str(target_file) != old_content
+            target_file.metadata['PO-Revision-Date'] = self.now
+        if changed and self.write:
+            target_file.save(str(file_path))
+        return UpdateResult(changed, time.perf_counter() - start)
+
     def _set_meta(self, project: Project, po_file: polib.POFile, lang: str) -> None:
-        now = datetime.fromisoformat(self.args.now).strftime('%F %H:%M%z')
         short_lang = lang.split('-')[0].split('_')[0]
         plurals = PLURALS.get(short_lang, GERMANIC)
         meta = po_file.metadata
 
         meta['Project-Id-Version'] = f'{project.name} {project.version}'
         meta.setdefault('Report-Msgid-Bugs-To', project.bug_tracker)
-        meta.setdefault('POT-Creation-Date', now)
-        meta['PO-Revision-Date'] = now
+        meta.setdefault('POT-Creation-Date', self.now)
+        meta['PO-Revision-Date'] = self.now
         meta.setdefault('Last-Translator', project.author)
         meta.setdefault('Language-Team', project.author)
         meta.setdefault('Language', lang)
@@ -132,3 +359,32 @@ class Extract(Command):
         meta.setdefault('Content-Transfer-Encoding', '8bit')
         meta.setdefault('Plural-Forms', str(plurals))
         meta['Generated-By'] = f'l10n {l10n.__version__}'
+
+
+# The template shared by all languages in a worker process.
+_worker_template: list[polib.POEntry] = []
+
+
+def _init_worker(payload: bytes) -> None:
+    _worker_template[:] = pickle.loads(payload)
+
+
+def _update_in_worker(updater: Updater, project: Project, lang: str) -> UpdateResult:
+    return updater.update(project, lang, _worker_template)
+
+
+def _snapshot(path: Path) -> dict[Path, tuple[int, int]]:
+    """Get modification time and size of all Python files in the given directory.
+    """
+    snapshot = {}
+    for file_path in find_sources(path):
+        try:
+            stat = file_path.stat()
+        except OSError:
+            continue
+        snapshot[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def _msg_position(msg: Message) -> tuple[str, int, int]:
+    return (msg.file_name, msg.line, msg.column)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import json
+from argparse import ArgumentParser
+from pathlib import Path
+
+from .._locales import Locales
+from .._project import Project, find_project_root
+from ._base import Command
+
+
+class Stats(Command):
+    """Show how much memory translations of the project take, as JSON.
+    """
+    @staticmethod
+    def init_parser(parser: ArgumentParser) -> None:
+        parser.add_argument(
+            '--path', type=Path, default=Path(),
+            help='the base directory from where to start project root lookup',
+        )
+        # what to report, runtime stats are the only kind for now
+        kinds = parser.add_mutually_exclusive_group(required=True)
+        kinds.add_argument(
+            '--runtime', action='store_true',
+            help='load compiled translations and report how much memory they take',
+        )
+
+    def run(self) -> int:
+        project = Project(find_project_root(self.args.path))
+        path = project.bundle_path
+        if not path.exists():
+            path = project.mo_root
+        if not path.exists():
+            self.print('no compiled translations found, run `l10n compile` first')
+            return 1
+        result = self._get_runtime_stats(Locales(path=path))
+        self.print(json.dumps(result, indent=2, ensure_ascii=False))
+        return 0
+
+    @staticmethod
+    def _get_runtime_stats(locales: Locales) -> dict:
+        """How much memory translations take when loaded, see `Locales.stats`.
+        """
+        languages: dict[str, dict[str, dict]] = {}
+        total_bytes = 0
+        for language, catalogs in locales.stats(load=True).items():
+            languages[language] = {}
+            for name, usage in catalogs.items():
+                languages[language][name] = dict(
+                    usage._asdict(),
+                    total_bytes=usage.total_bytes,
+                )
+                total_bytes += usage.total_bytes
+        return dict(languages=languages, total_bytes=total_bytes)
@@ -1,14 +1,25 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
 from argparse import ArgumentParser
+from collections import Counter
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Iterable, Iterator
 
 import polib
 
+from .._backends import BatchTranslator, load_backend
+from .._memory import Match, TranslationMemory
 from .._project import Project, find_project_root
+from .._workspace import Workspace
 from ._base import Command
 
 
 class Translate(Command):
-    """Translate all text without translation using Google Translate.
+    """Translate all text without translation using Google Translate or another service.
     """
     @staticmethod
     def init_parser(parser: ArgumentParser) -> None:
@@ -20,38 +31,236 @@ class Translate(Command):
             '--src-lang', default='en',
             help='the language used for messages (msgid)',
         )
+        parser.add_argument(
+            '--backend', default='google',
+            help='the translation service: `google` or import path `module:Class`',
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=4,
+            help='how many requests to the translation service can run at once',
+        )
+        parser.add_argument(
+            '--rate', type=float, default=0,
+            help='max number of requests per second, 0 means no limit',
+        )
+        parser.add_argument(
+            '--retries', type=int, default=3,
+            help='how many times to retry a failed request',
+        )
+        parser.add_argument(
+            '--no-memory', action='store_true',
+            help='do not use translations made before, stored in the translation memory',
+        )
+        parser.add_argument(
+            '--similar', action='store_true',
+            help='reuse translations of messages that differ only in case or punctuation',
+        )
+        parser.add_argument(
+            '--checkpoint-every', type=int, default=100,
+            help='save PO files after so many new translations',
+        )
+        parser.add_argument(
+            '--checkpoint-interval', type=float, default=30,
+            help='save PO files at least once in so many seconds',
+        )
+        parser.add_argument(
+            '--workspace', action='store_true',
+            help='translate all projects (with `pyproject.toml`) inside of the path',
+        )
 
     def run(self) -> int:
-        try:
-            from googletrans import Translator
-        except ImportError:
-            msg = 'Please, run `python3 -m pip install googletrans==4.0.0rc1`'
-            raise ImportError(msg)
-
-        project_root = find_project_root(self.args.path)
-        project = Project(project_root)
-        translator = Translator()
-        for po_path in project.po_root.iterdir():
-            if po_path.suffix != '.po':
-                continue
-            self.print(po_path.stem)
-            translated = 0
+        project = Project(find_project_root(self.args.path))
+        projects: tuple[Project, ...] = (project,)
+        if self.args.workspace:
+            projects = Workspace(self.args.path).projects
+        translator = BatchTranslator(
+            backend=load_backend(self.args.backend),
+            concurrency=self.args.concurrency,
+            rate=self.args.rate,
+            retries=self.args.retries,
+        )
+        src = self.args.src_lang
+
+        po_files = {}
+        stats: dict[Path, Counter[str]] = {}
+        # Entries without translation for each target language and message.
+        # Languages that translate into the same target language
+        # (like pt_BR and pt_PT) share the requests.
+        pending: dict[str, dict[str, list[tuple[Path, polib.POEntry]]]] = {}
+        owners: dict[Path, Project] = {}
+        for po_path, owner in self._find_po_files(projects):
+            owners[po_path] = owner
             po_file = polib.pofile(str(po_path))
-            dest_lang = po_file.metadata.get('Language', po_path.stem)
-            dest_lang = dest_lang.split('_')[0]
-            dest_lang = dest_lang.split('-')[0]
+            po_files[po_path] = po_file
+            stats[po_path] = Counter()
+            by_msgid = pending.setdefault(self._get_dest_lang(po_path, po_file), {})
             for entry in po_file:
                 if entry.msgstr:
+                    stats[po_path]['skipped'] += 1
                     continue
-                translation = translator.translate(
-                    entry.msgid,
-                    src=self.args.src_lang,
+                by_msgid.setdefault(entry.msgid, []).append((po_path, entry))
+
+        checkpoint = Checkpoint(
+            po_files,
+            every=self.args.checkpoint_every,
+            interval=self.args.checkpoint_interval,
+        )
+        memory = None
+        if not self.args.no_memory:
+            memory = TranslationMemory(project.translation_memory)
+
+        def apply(
+            dest_lang: str,
+            matches: dict[str, Match | None], *,
+            remembered: bool = False,
+        ) -> None:
+            for msgid, match in matches.items():
+                for po_path, entry in pending[dest_lang].pop(msgid, []):
+                    if match is None:
+                        stats[po_path]['failed'] += 1
+                        continue
+                    entry.msgstr = match.translation
+                    if match.source != msgid:
+                        entry.previous_msgid = match.source
+                    if 'fuzzy' not in entry.flags:
+                        entry.flags.append('fuzzy')
+                    stats[po_path]['translated'] += 1
+                    if remembered:
+                        stats[po_path]['from memory'] += 1
+                    checkpoint.add(po_path)
+            checkpoint.maybe_save()
+
+        def on_batch(
+            dest_lang: str,
+            translations: dict[str, str | None],
+            error: Exception | None,
+        ) -> None:
+            if error is not None:
+                self.print(
+                    f'failed to translate {len(translations)} messages into {dest_lang}: '
+                    f'{type(error).__name__}: {error}',
+                )
+            if memory is not None:
+                memory.add(
+                    [(t, tr) for t, tr in translations.items() if tr is not None],
+                    src=src,
                     dest=dest_lang,
                 )
-                entry.msgstr = translation.text
-                if 'fuzzy' not in entry.flags:
-                    entry.flags.append('fuzzy')
-                translated += 1
-            po_file.save()
-            self.print(f'  translated: {translated}')
-        return 0
+            matches = {
+                t: None if tr is None else Match(t, tr)
+                for t, tr in translations.items()
+            }
+            apply(dest_lang, matches)
+
+        interrupted = False
+        with memory or nullcontext():
+            try:
+                if memory is not None:
+                    for dest_lang, by_msgid in pending.items():
+                        matches = self._recall(memory, list(by_msgid), dest=dest_lang)
+                        apply(dest_lang, dict(matches), remembered=True)
+                messages = {dest: list(by_msgid) for dest, by_msgid in pending.items()}
+                asyncio.run(translator.translate(messages, src=src, on_batch=on_batch))
+            except KeyboardInterrupt:
+                interrupted = True
+            finally:
+                checkpoint.save()
+
+        code = 0
+        current: Project | None = None
+        for po_path, counter in stats.items():
+            if self.args.workspace and owners[po_path] is not current:
+                current = owners[po_path]
+                self.print(f'{current.name}:')
+            self.print(po_path.stem)
+            self.print(f'  translated: {counter["translated"]}')
+            if counter['from memory']:
+                self.print(f'  from memory: {counter["from memory"]}')
+            self.print(f'  skipped: {counter["skipped"]}')
+            self.print(f'  failed: {counter["failed"]}')
+            if counter['failed']:
+                code = 1
+        if interrupted:
+            self.print('interrupted, run the command again to continue')
+            code = 1
+        return code
+
+    @staticmethod
+    def _find_po_files(projects: Iterable[Project]) -> Iterator[tuple[Path, Project]]:
+        for project in projects:
+            for po_path in sorted(project.po_root.iterdir()):
+                if po_path.suffix == '.po':
+                    yield po_path, project
+
+    def _recall(
+        self,
+        memory: TranslationMemory,
+        texts: list[str], *,
+        dest: str,
+    ) -> dict[str, Match]:
+        """Find translations for the messages in the translation memory.
+        """
+        src = self.args.src_lang
+        matches = {}
+        for text in dict.fromkeys(texts):
+            translation = memory.get(text, src=src, dest=dest)
+            if translation is not None:
+                matches[text] = Match(text, translation)
+                continue
+            if self.args.similar:
+                match = memory.find_similar(text, src=src, dest=dest)
+                if match is not None:
+                    matches[text] = match
+        return matches
+
+    @staticmethod
+    def _get_dest_lang(po_path: Path, po_file: polib.POFile) -> str:
+        dest_lang = po_file.metadata.get('Language', po_path.stem)
+        dest_lang = dest_lang.split('_')[0]
+        dest_lang = dest_lang.split('-')[0]
+        return dest_lang
+
+
+class Checkpoint:
+    """Periodically save the modified PO files.
+
+    If the translation gets interrupted, the next run continues from the last
+    checkpoint because already translated entries are skipped.
+    Files are written into a temporary file first, so an interruption
+    in the middle of writing doesn't corrupt them.
+    """
+    def __init__(
+        self,
+        po_files: dict[Path, polib.POFile], *,
+        every: int,
+        interval: float,
+    ) -> None:
+        self.po_files = po_files
+        self.every = every
+        self.interval = interval
+        self.changed: set[Path] = set()
+        self.changes = 0
+        self.saved_at = time.monotonic()
+
+    def add(self, po_path: Path) -> None:
+        """Mark the PO file as modified.
+        """
+        self.changed.add(po_path)
+        self.changes += 1
+
+    def maybe_save(self) -> None:
+        """Save the modified files if there are enough changes or it's time to.
+        """
+        if self.changes >= self.every:
+            self.save()
+        elif time.monotonic() - self.saved_at >= self.interval:
+            self.save()
+
+    def save(self) -> None:
+        for po_path in sorted(self.changed):
+            tmp_path = po_path.with_name(f'.{po_path.name}.tmp')
+            self.po_files[po_path].save(str(tmp_path))
+            os.replace(tmp_path, po_path)
+        self.changed.clear()
+        self.changes = 0
+        self.saved_at = time.monotonic()
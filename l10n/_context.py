@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from ._locale import Locale
+
+
+# The locale activated for the current thread or asyncio task.
+locale_var: ContextVar[Locale | None] = ContextVar('l10n_locale', default=None)
+
+
+@contextmanager
+def activate(locale: Locale | None) -> Iterator[Locale | None]:
+    """Make the locale active inside of the `with` block.
+
+    The active locale is used by `l10n.get`. It is stored in a context variable,
+    so each thread and each asyncio task has its own active locale,
+    and tasks started inside of the block inherit it.
+    Passing None deactivates the current locale.
+    """
+    token = locale_var.set(locale)
+    try:
+        yield locale
+    finally:
+        locale_var.reset(token)
+
+
+def active_locale() -> Locale | None:
+    """The locale activated by `l10n.activate`, if any.
+    """
+    return locale_var.get()
+
+
+def get(
+    message: str, *,
+    context: str | None = None,
+    plural: str | None = None,
+    n: int | None = None,
+    comment: str = '',
+) -> str:
+    """Get translation for the message from the active locale.
+
+    The same as `Locale.get` called on the locale activated by `l10n.activate`.
+    If no locale is active, the message itself will be used.
+    """
+    locale = locale_var.get()
+    if locale is not None:
+        return locale.get(message, context=context, plural=plural, n=n, comment=comment)
+    if n is not None and n != 1:
+        return plural or message
+    return message
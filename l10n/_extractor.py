@@ -1,17 +1,30 @@
 from __future__ import annotations
 
+import ast
 import json
+import os
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from configparser import ConfigParser
 from pathlib import Path
-from tempfile import NamedTemporaryFile
+from tempfile import TemporaryDirectory
 from textwrap import dedent
-from typing import Iterator, NamedTuple
+from typing import IO, Iterable, Iterator, Sequence
 
-from mypy import types
-from mypy.plugin import MethodContext, Plugin
+from mypy import api, types
+from mypy.options import Options
+from mypy.plugin import (
+    FunctionContext, MethodContext, Plugin, ReportConfigContext,
+)
 from mypy.types import LiteralValue
 
+from . import __version__
+from ._cache import MessageCache
+from ._message import Message
+from ._sources import SKIP_DIRS, find_sources, get_file_name
+
 
 PREFIX = '__L10N__:'
 CONFIG = f"""
@@ -21,52 +34,309 @@ CONFIG = f"""
 
     [mypy-l10n.*]
     follow_imports = normal
+
+    [l10n]
+    channel = {{channel}}
 """
 
+# Streams opened by the plugin for reporting messages, by the channel name.
+CHANNELS: dict[str, IO[str]] = {}
+
+
+def extract_messages(
+    project_path: Path, *,
+    cache_dir: Path | None = None,
+    jobs: int = 1,
+    in_process: bool = False,
+) -> Iterator[Message]:
+    """Find all messages in the project using mypy.
+
+    Args:
+        project_path: path to the directory or file to analyze.
+        cache_dir: if specified, messages found in each file are cached
+            in the given directory. Mypy runs in incremental mode and keeps
+            its cache there as well, so it analyzes only new and changed files
+            and files that depend on them. Messages of other files are taken
+            from the cache.
+        jobs: how many mypy processes to run in parallel.
+            Each process analyzes its own subset of files.
+        in_process: run mypy in the current process instead of a subprocess.
+            It saves the interpreter startup time but messages are available
+            only when mypy finishes and `jobs` is ignored.
+    """
+    # Mypy fails if there is nothing to analyze.
+    if next(find_sources(project_path), None) is None:
+        return
+    if in_process:
+        jobs = 1
+    shards = get_shards(project_path) if jobs > 1 else [[project_path]]
+    if cache_dir is None:
+        flags = ['--no-incremental']
+        yield from _run_shards(shards, flags, jobs=jobs, in_process=in_process)
+        return
+
+    cache = MessageCache(cache_dir / 'messages-mypy.json', key=f'mypy {__version__}')
+    cache.load()
+    mypy_cache = cache_dir / 'mypy'
+    # Mypy doesn't report messages for the modules it considers fresh,
+    # so its cache must not outlive the messages cache.
+    if not cache.valid:
+        shutil.rmtree(mypy_cache, ignore_errors=True)
+    cache.invalidate()
+    flags = ['--incremental', '--cache-dir', str(mypy_cache)]
+    # Mypy gets all the files, so that it knows constants imported from
+    # other files, and reports which of them it has actually analyzed.
+    analyzed: set[str] = set()
+    messages = _run_shards(
+        shards, flags, jobs=jobs, in_process=in_process, analyzed=analyzed,
+    )
+    yield from cache.replay(find_sources(project_path), messages, analyzed)
+    cache.save()
+
+
+def extract_files(
+    paths: Sequence[Path], *,
+    follow_imports: bool = False,
+    in_process: bool = False,
+) -> Iterator[Message]:
+    """Find messages in the given files, without using any cache.
+
+    By default, imports aren't followed, so constants defined in files that
+    aren't in the list are unknown, and messages that use them are missed.
+    If `follow_imports` is True, mypy analyzes imported modules as well,
+    and messages found in them are reported too.
+    """
+    flags = ['--no-incremental']
+    if follow_imports:
+        flags.extend(['--follow-imports', 'silent'])
+    yield from _run_mypy(paths, flags, in_process=in_process)
+
+
+def get_shards(project_path: Path) -> list[list[Path]]:
+    """Split the project into groups of paths that can be analyzed independently.
+
+    Each top-level directory with Python files is a candidate shard,
+    and all top-level Python files form one more. Mypy is configured
+    to not follow imports, so a module from another shard would be unknown,
+    and messages defined in it (like `Final` constants) would be lost.
+    Hence candidates that import each other, directly or through other
+    candidates, are merged into one shard.
+    """
+    if not project_path.is_dir():
+        return [[project_path]]
+    candidates: list[list[Path]] = []
+    files: list[Path] = []
+    for path in sorted(project_path.iterdir()):
+        if path.name.startswith('.') or path.name in SKIP_DIRS:
+            continue
+        if path.is_dir():
+            if next(path.rglob('*.py'), None) is not None:
+                candidates.append([path])
+        elif path.suffix in ('.py', '.pyi'):
+            files.append(path)
+    if files:
+        candidates.append(files)
+
+    # Top-level module names provided by each candidate.
+    owners: dict[str, int] = {}
+    for index, paths in enumerate(candidates):
+        for path in paths:
+            owners[path.stem] = index
+    # Union-find over candidates, each one points to its parent.
+    parents = list(range(len(candidates)))
+
+    def find(index: int) -> int:
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    for index, paths in enumerate(candidates):
+        for path in paths:
+            for source in find_sources(path):
+                for name in _get_imports(source):
+                    owner = owners.get(name)
+                    if owner is not None:
+                        parents[find(owner)] = find(index)
+
+    shards: dict[int, list[Path]] = {}
+    for index, paths in enumerate(candidates):
+        shards.setdefault(find(index), []).extend(paths)
+    return list(shards.values())
+
+
+def _get_imports(path: Path) -> Iterator[str]:
+    """Top-level names of all modules imported by the file.
+
+    Relative imports are skipped, they point into the same shard.
+    """
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (SyntaxError, ValueError, OSError):
+        return
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                yield alias.name.partition('.')[0]
+        elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+            yield node.module.partition('.')[0]
 
-class Message(NamedTuple):
-    text: str
-    line: int
-    column: int
-    n: int | None
-    context: str | None
-    comment: str | None
-    plural: str | None
-    file_name: str
-
-    @property
-    def path(self) -> Path:
-        return Path(self.file_name)
-
-
-def extract_messages(project_path: Path) -> Iterator[Message]:
-    config = dedent(CONFIG)
-    with NamedTemporaryFile() as tmp_file:
-        tmp_file.write(config.encode())
-        tmp_file.flush()
-        cmd = [
-            sys.executable, '-m', 'mypy',
-            '--no-incremental',
+
+def _run_shards(
+    shards: list[list[Path]],
+    flags: list[str], *,
+    jobs: int,
+    in_process: bool,
+    analyzed: set[str] | None = None,
+) -> Iterator[Message]:
+    if len(shards) == 1:
+        yield from _run_mypy(shards[0], flags, in_process=in_process, analyzed=analyzed)
+        return
+    # Each job spends all its time waiting for the mypy subprocess,
+    # so threads are enough to keep all the processes busy.
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(list, _run_mypy(paths, flags, analyzed=analyzed))
+            for paths in shards
+        ]
+        for future in futures:
+            yield from future.result()
+
+
+def _run_mypy(
+    paths: Sequence[Path],
+    flags: list[str], *,
+    in_process: bool = False,
+    analyzed: set[str] | None = None,
+) -> Iterator[Message]:
+    """Run mypy with the plugin and read messages it reports.
+
+    If `analyzed` is specified, paths of files that mypy has analyzed
+    are added into it. In incremental mode, mypy skips files that are fresh.
+    """
+    with TemporaryDirectory() as tmp_dir:
+        config_path = Path(tmp_dir, 'mypy.ini')
+        args = [
+            *flags,
             '--show-traceback',
             '--check-untyped-defs',
-            '--config-file', tmp_file.name,
-            str(project_path),
+            '--config-file', str(config_path),
+            *[str(path) for path in paths],
         ]
-        # result = subprocess.run(cmd)
-        result = subprocess.run(cmd, stdout=subprocess.PIPE)
-    for line in result.stdout.decode().splitlines():
-        if not line.startswith(PREFIX):
+
+        # Run mypy in the current process and read all messages when it's done.
+        if in_process:
+            channel_path = Path(tmp_dir, 'messages.jsonl')
+            channel_path.touch()
+            config_path.write_text(dedent(CONFIG).format(channel=channel_path))
+            stdout, stderr, status = api.run(args)
+            stream = CHANNELS.pop(str(channel_path), None)
+            if stream is not None:
+                stream.close()
+            _check_status(status, stdout + stderr)
+            with channel_path.open(encoding='utf8') as stream:
+                yield from _read_messages(stream, analyzed)
+            return
+
+        # Run mypy in a subprocess and read messages from a pipe as soon as
+        # the plugin reports them.
+        log_path = Path(tmp_dir, 'mypy.log')
+        read_fd, write_fd = os.pipe()
+        try:
+            config_path.write_text(dedent(CONFIG).format(channel=write_fd))
+            with log_path.open('w', encoding='utf8') as log:
+                proc = subprocess.Popen(
+                    [sys.executable, '-m', 'mypy', *args],
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                    pass_fds=(write_fd,),
+                )
+        except BaseException:
+            os.close(read_fd)
+            raise
+        finally:
+            os.close(write_fd)
+        with open(read_fd, encoding='utf8') as stream:
+            try:
+                yield from _read_messages(stream, analyzed)
+            except GeneratorExit:
+                proc.kill()
+                raise
+            finally:
+                proc.wait()
+        _check_status(proc.returncode, log_path.read_text(encoding='utf8'))
+
+
+def _check_status(status: int, output: str) -> None:
+    """Fail if mypy couldn't analyze the code, so that messages are not lost silently.
+
+    Exit status 1 means that mypy found type errors, which is fine.
+    """
+    if status in (0, 1):
+        return
+    raise RuntimeError(f'mypy failed with exit status {status}:\n{output.strip()}')
+
+
+def _read_messages(
+    stream: Iterable[str],
+    analyzed: set[str] | None = None,
+) -> Iterator[Message]:
+    for line in stream:
+        data = json.loads(line)
+        # not a message but a file that mypy has analyzed
+        if 'analyzed' in data:
+            if analyzed is not None:
+                analyzed.add(get_file_name(data['analyzed']))
             continue
-        line = line[len(PREFIX):].strip()
-        yield Message(**json.loads(line))
+        data['file_name'] = get_file_name(data['file_name'])
+        yield Message(**data)
+
+
+def _open_channel(options: Options) -> IO[str] | None:
+    """Open the stream for reporting messages specified in the mypy config.
+
+    The channel is either a file descriptor number or a path to a file.
+    """
+    if not options.config_file:
+        return None
+    config = ConfigParser()
+    config.read(options.config_file)
+    channel = config.get('l10n', 'channel', fallback='')
+    if not channel:
+        return None
+    stream = CHANNELS.get(channel)
+    if stream is None:
+        if channel.isdigit():
+            stream = open(int(channel), 'w', encoding='utf8', buffering=1)
+        else:
+            stream = open(channel, 'a', encoding='utf8', buffering=1)
+        CHANNELS[channel] = stream
+    return stream
 
 
 class LookupPlugin(Plugin):
+    def __init__(self, options: Options) -> None:
+        super().__init__(options)
+        self._channel = _open_channel(options)
+
     def get_method_hook(self, fullname: str):
         if fullname == 'l10n._locale.Locale.get':
             return self._extractor
 
-    def _extractor(self, context: MethodContext):
+    def get_function_hook(self, fullname: str):
+        # `l10n.get` that uses the active locale
+        if fullname == 'l10n._context.get':
+            return self._extractor
+
+    def report_config_data(self, ctx: ReportConfigContext) -> str:
+        # Mypy calls it with is_check=False when writing the cache for a module,
+        # which happens only for the modules it has analyzed.
+        if not ctx.is_check and self._channel is not None:
+            print(json.dumps(dict(analyzed=ctx.path)), file=self._channel)
+        # Invalidate mypy cache when the extractor changes.
+        return __version__
+
+    def _extractor(self, context: MethodContext | FunctionContext):
         message = self._get_arg('message', context)
         if message:
             self._record(
@@ -81,7 +351,11 @@ class LookupPlugin(Plugin):
             )
         return context.default_return_type
 
-    def _get_arg(self, name: str, context: MethodContext) -> LiteralValue | None:
+    def _get_arg(
+        self,
+        name: str,
+        context: MethodContext | FunctionContext,
+    ) -> LiteralValue | None:
         index = context.callee_arg_names.index(name)
         arg_types = context.arg_types[index]
         if len(arg_types) != 1:
@@ -94,7 +368,10 @@ class LookupPlugin(Plugin):
         return arg_type.last_known_value.value
 
     def _record(self, **data: object) -> None:
-        print(PREFIX, json.dumps(data))
+        if self._channel is None:
+            print(PREFIX, json.dumps(data))
+            return
+        print(json.dumps(data), file=self._channel)
 
 
 def plugin(version: str):
@@ -1,21 +1,52 @@
 from __future__ import annotations
 
-import datetime
-import gettext
-import locale
-import threading
+import sys
+import time
+from _thread import allocate_lock
 from contextlib import contextmanager
-from decimal import Decimal
 from functools import cached_property
 from pathlib import Path
-from typing import Tuple, Union
+from typing import (
+    TYPE_CHECKING, Any, BinaryIO, Callable, Hashable, NamedTuple, Sequence,
+    Tuple, Union,
+)
+from weakref import WeakValueDictionary
+
+
+# Modules like `locale`, `gettext`, and `datetime` are imported only
+# when they are needed, to keep `import l10n` fast for short-lived processes.
+if TYPE_CHECKING:
+    import datetime
+    from decimal import Decimal
 
 
 SingularID = str
 PluralID = Tuple[str, int]
 MsgID = Union[SingularID, PluralID]
-locale_lock = threading.Lock()
+# the same as threading.Lock but without importing threading
+locale_lock = allocate_lock()
 SYSTEM_LOCALES = Path('/usr/share/locale')
+# Names of system catalogs used by `translate_*` methods.
+ISO_CATALOGS = ('iso_3166-1', 'iso_4217', 'iso_639-2', 'iso_639-3')
+
+
+class MemoryUsage(NamedTuple):
+    """How much memory the translations from a mo file take.
+    """
+    # if the catalog isn't loaded yet, all other values are zeros
+    loaded: bool
+    # the number of translations, each plural form is a separate one
+    entries: int = 0
+    # the size of all message IDs and translations as Python strings
+    string_bytes: int = 0
+    # the size of the dict holding translations and tuples used as plural keys
+    container_bytes: int = 0
+    # how many seconds it took to read and parse the mo file
+    load_time: float = 0.0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.string_bytes + self.container_bytes
 
 
 class Locale:
@@ -58,13 +89,15 @@ class Locale:
             comment: not used in runtime but included in PO files.
                 Use it to provide additional information for translators.
         """
+        # load the catalog first, it also sets the plural forms function
+        messages = self._messages
         msgid_str = message
         if context is not None:
             msgid_str = f'{context}\x04{msgid_str}'
         msgid: MsgID = msgid_str
         if n is not None:
             msgid = (msgid_str, self._plural_id(n))
-        translation = self._messages.get(msgid)
+        translation = messages.get(msgid)
 
         if translation is not None:
             return translation
@@ -72,6 +105,69 @@ class Locale:
             return plural or message
         return message
 
+    def get_plural(
+        self,
+        message: str,
+        plural: str,
+        counts: Sequence[int], *,
+        context: str | None = None,
+    ) -> list[str]:
+        """Get translations of the plural message for each of the given numbers.
+
+        The same as calling `Locale.get(message, plural=plural, n=n)` for each number
+        but the plural form rule is evaluated for all numbers at once,
+        see `Locale.plural_index_many`.
+        """
+        msgid = message
+        if context is not None:
+            msgid = f'{context}\x04{msgid}'
+        messages = self._messages
+        # there are only a few plural forms, so each is looked up only once
+        forms: dict[int, str | None] = {}
+        result = []
+        for n, index in zip(counts, self.plural_index_many(counts)):
+            index = int(index)
+            if index not in forms:
+                forms[index] = messages.get((msgid, index))
+            translation = forms[index]
+            if translation is None:
+                translation = message if n == 1 else plural
+            result.append(translation)
+        return result
+
+    def plural_index_many(self, counts: Sequence[int]) -> Any:
+        """Get the index of the plural form to use for each of the given numbers.
+
+        If numpy is installed, the plural forms rule of the language is converted
+        into array operations and evaluated for all numbers at once.
+        Returns a numpy array if `counts` is a numpy array and a list otherwise.
+        """
+        self._messages
+        plural_many = self._plural_many
+        if plural_many is None:
+            return [self._plural_id(n) for n in counts]
+        result = plural_many(counts)
+        # numpy array
+        if hasattr(counts, 'dtype'):
+            return result
+        return result.tolist()
+
+    def memory_usage(self) -> dict[str, MemoryUsage]:
+        """Report how much memory the translations of the locale take.
+
+        The usage of the locale's own mo file is reported as `messages`.
+        System catalogs used by `translate_*` methods (like `iso_3166-1`)
+        are reported only if they have been loaded.
+        The catalogs aren't loaded by this method. Keep in mind that locales
+        reading the same mo file share its content.
+        """
+        result = {'messages': self._memory_usage()}
+        for name in ISO_CATALOGS:
+            iso_locale = vars(self).get('_' + name.replace('-', '_'))
+            if iso_locale is not None:
+                result[name] = iso_locale._memory_usage()
+        return result
+
     @property
     def language(self) -> str:
         """The language of the Locale.
@@ -85,7 +181,7 @@ class Locale:
 
         You need the locale do be compiled in your OS.
         """
-        format = self._get_locale_info(locale.D_FMT)
+        format = self._get_locale_info('D_FMT')
         return date.strftime(format)
 
     def format_time(self, time: datetime.time) -> str:
@@ -93,7 +189,7 @@ class Locale:
 
         You need the locale do be compiled in your OS.
         """
-        format = self._get_locale_info(locale.T_FMT)
+        format = self._get_locale_info('T_FMT')
         return time.strftime(format)
 
     def format_datetime(self, dt: datetime.datetime) -> str:
@@ -101,7 +197,7 @@ class Locale:
 
         You need the locale do be compiled in your OS.
         """
-        format = self._get_locale_info(locale.D_T_FMT)
+        format = self._get_locale_info('D_T_FMT')
         return dt.strftime(format)
 
     def format_month(self, n: int, *, abbreviate: bool = False) -> str:
@@ -110,8 +206,7 @@ class Locale:
         You need the locale do be compiled in your OS.
         """
         prefix = 'AB' if abbreviate else ''
-        info_key = getattr(locale, f'{prefix}MON_{n}')
-        return self._get_locale_info(info_key)
+        return self._get_locale_info(f'{prefix}MON_{n}')
 
     def format_dow(self, n: int, *, abbreviate: bool = False, sunday: int = 0) -> str:
         """Format the day of week.
@@ -136,8 +231,7 @@ class Locale:
         elif sunday == 6:
             n = (n - 6) % 7 + 1
         prefix = 'AB' if abbreviate else ''
-        info_key = getattr(locale, f'{prefix}DAY_{n}')
-        return self._get_locale_info(info_key)
+        return self._get_locale_info(f'{prefix}DAY_{n}')
 
     @cached_property
     def currency_symbol(self) -> str:
@@ -145,7 +239,7 @@ class Locale:
 
         You need the locale do be compiled in your OS.
         """
-        return self._get_locale_info(locale.CRNCYSTR)[1:]
+        return self._get_locale_info('CRNCYSTR')[1:]
 
     @cached_property
     def decimal_dot(self) -> str:
@@ -155,7 +249,7 @@ class Locale:
 
         You need the locale do be compiled in your OS.
         """
-        return self._get_locale_info(locale.RADIXCHAR)
+        return self._get_locale_info('RADIXCHAR')
 
     @cached_property
     def thousands_separator(self) -> str:
@@ -168,7 +262,7 @@ class Locale:
 
         You need the locale do be compiled in your OS.
         """
-        return self._get_locale_info(locale.THOUSEP)
+        return self._get_locale_info('THOUSEP')
 
     def format_currency(
         self,
@@ -189,6 +283,7 @@ class Locale:
             international: use international currency symbol.
             grouping: add thousands separator.
         """
+        import locale
         with self._context():
             return locale.currency(
                 val,
@@ -218,6 +313,7 @@ class Locale:
                 is not specified.
             exp: if True, represent large numbers in scientific exponent notation.
         """
+        import locale
         fmt_suffix = 'g' if exp else 'f'
         fmt = f'%.{precision}{fmt_suffix}' if precision is not None else f'%{fmt_suffix}'
         with self._context():
@@ -247,12 +343,14 @@ class Locale:
     def parse_float(self, s: str) -> float:
         """Convert string generated by `Locale.format_float` back into float.
         """
+        import locale
         with self._context():
             return locale.atof(s)
 
     def parse_int(self, s: str) -> int:
         """Convert string generated by `Locale.format_int` back into int.
         """
+        import locale
         with self._context():
             return locale.atoi(s)
 
@@ -312,6 +410,7 @@ class Locale:
         return self._read_system_messages('iso_639-3.mo')
 
     def _read_system_messages(self, name: str) -> Locale | None:
+        import locale
         long_lang = locale.normalize(self.language).split('.')[0]
         short_lang = long_lang.split('_')[0].split('-')[0]
         for lang in (self.language, long_lang, short_lang):
@@ -320,12 +419,16 @@ class Locale:
                 return Locale(path, language=lang)
         return None
 
-    def _get_locale_info(self, info_key: int) -> str:
+    def _get_locale_info(self, name: str) -> str:
+        """Get the locale info by the name of its constant in the `locale` module.
+        """
+        import locale
         with self._context():
-            return locale.nl_langinfo(info_key)
+            return locale.nl_langinfo(getattr(locale, name))
 
     @contextmanager
     def _context(self):
+        import locale
         with locale_lock:
             old_lang, old_enc = locale.getlocale()
             locale.setlocale(locale.LC_ALL, locale.normalize(self.language))
@@ -334,15 +437,54 @@ class Locale:
             finally:
                 locale.setlocale(locale.LC_ALL, (old_lang, old_enc))
 
-    @cached_property
-    def _messages(self) -> dict[MsgID, str]:
+    def _open(self) -> BinaryIO:
         if self.path is None:
             raise RuntimeError('path to mo file is not specified for the Locale')
-        with self.path.open('rb') as stream:
-            tr = gettext.GNUTranslations(stream)    # type: ignore[arg-type]
-        self._plural_id = tr.plural                 # type: ignore
-        self._headers = tr._info                    # type: ignore[attr-defined]
-        return tr._catalog                          # type: ignore[attr-defined]
+        return self.path.open('rb')
+
+    def _identity(self) -> Hashable:
+        """The key used for comparing and hashing locales.
+
+        Locales reading the same mo file are equal, whatever their language is.
+        """
+        if self.path:
+            return ('path', self.path)
+        return ('language', self._lang)
+
+    def _catalog_key(self) -> Hashable:
+        """The key identifying the content of the mo file in the catalogs registry.
+        """
+        if self.path is None:
+            raise RuntimeError('path to mo file is not specified for the Locale')
+        path = self.path.resolve()
+        stat = path.stat()
+        return (str(path), stat.st_dev, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _memory_usage(self) -> MemoryUsage:
+        catalog = vars(self).get('_catalog')
+        if catalog is None and self.path is not None:
+            # the catalog might be loaded by another Locale for the same file
+            try:
+                key = self._catalog_key()
+            except OSError:
+                return MemoryUsage(loaded=False)
+            with catalogs_lock:
+                catalog = catalogs.get(key)
+        if catalog is None:
+            return MemoryUsage(loaded=False)
+        return catalog.memory_usage()
+
+    @cached_property
+    def _catalog(self) -> Catalog:
+        # The Locale keeps the catalog alive in the registry.
+        return get_catalog(self._catalog_key(), self._open)
+
+    @cached_property
+    def _messages(self) -> dict[MsgID, str]:
+        catalog = self._catalog
+        self._plural_id = catalog.plural_id         # type: ignore
+        self._headers = catalog.headers             # type: ignore[misc]
+        return catalog.messages
 
     @cached_property
     def _headers(self) -> dict[str, str]:
@@ -352,6 +494,20 @@ class Locale:
     def _plural_id(self, n: int) -> int:
         return int(n != 1)
 
+    @cached_property
+    def _plural_many(self) -> Callable[[Any], Any] | None:
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            return None
+        from ._plurals import GERMANIC, compile_plural_many
+        expr = GERMANIC.expr
+        for part in self._headers.get('plural-forms', '').split(';'):
+            name, _, value = part.partition('=')
+            if name.strip() == 'plural':
+                expr = value.strip()
+        return compile_plural_many(expr)
+
     # MAGIC METHODS
 
     def __repr__(self) -> str:
@@ -360,6 +516,67 @@ class Locale:
     def __eq__(self, other):
         if not isinstance(other, Locale):
             return NotImplemented
-        if self.path:
-            return self.path == other.path
-        return self._lang == other._lang
+        return self._identity() == other._identity()
+
+    def __hash__(self) -> int:
+        return hash(self._identity())
+
+
+class Catalog:
+    """Translations from a mo file, shared by all Locale objects reading the same file.
+    """
+    __slots__ = ('messages', 'headers', 'plural_id', 'load_time', '__weakref__')
+
+    def __init__(self, stream: BinaryIO) -> None:
+        import gettext
+        start = time.perf_counter()
+        tr = gettext.GNUTranslations(stream)        # type: ignore[arg-type]
+        self.load_time = time.perf_counter() - start
+        self.messages: dict[MsgID, str] = tr._catalog   # type: ignore[attr-defined]
+        self.headers: dict[str, str] = tr._info         # type: ignore[attr-defined]
+        self.plural_id: Callable[[int], int] = tr.plural  # type: ignore[attr-defined]
+
+    def memory_usage(self) -> MemoryUsage:
+        """Calculate how much memory the translations take.
+        """
+        container_bytes = sys.getsizeof(self.messages)
+        # plural forms of a message share the same msgid string
+        strings: dict[int, int] = {}
+        for msgid, translation in self.messages.items():
+            if isinstance(msgid, tuple):
+                container_bytes += sys.getsizeof(msgid)
+                msgid = msgid[0]
+            strings[id(msgid)] = sys.getsizeof(msgid)
+            strings[id(translation)] = sys.getsizeof(translation)
+        return MemoryUsage(
+            loaded=True,
+            entries=len(self.messages),
+            string_bytes=sum(strings.values()),
+            container_bytes=container_bytes,
+            load_time=self.load_time,
+        )
+
+
+# All catalogs loaded in the process. A catalog is removed from the registry
+# as soon as there are no Locale objects using it.
+catalogs: WeakValueDictionary[Hashable, Catalog] = WeakValueDictionary()
+catalogs_lock = allocate_lock()
+
+
+def get_catalog(key: Hashable, open: Callable[[], BinaryIO]) -> Catalog:
+    """Get the catalog from the registry or load it using the given function.
+
+    The key must identify the file and its content, like the path,
+    the inode, and the modification time. So, if the file changes,
+    it will be loaded again.
+    """
+    with catalogs_lock:
+        catalog = catalogs.get(key)
+    if catalog is not None:
+        return catalog
+    # Two threads might load the same file at the same time,
+    # but only the first loaded catalog gets into the registry.
+    with open() as stream:
+        catalog = Catalog(stream)
+    with catalogs_lock:
+        return catalogs.setdefault(key, catalog)
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
-import fnmatch
-import inspect
-import locale
-import re
+import os
+import sys
 from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Iterator
+from typing import TYPE_CHECKING, Iterator
 
-from ._locale import Locale
+from ._bundle import Bundle, is_bundle
+from ._locale import Locale, MemoryUsage
+
+
+if TYPE_CHECKING:
+    import re
+    from types import FrameType
 
 
 class Locales:
@@ -16,6 +20,7 @@ class Locales:
 
     Args:
         path: where compiled locales are located.
+            It can be also a bundle file produced by `l10n compile --bundle`.
         format: file name template for compiled locales.
     """
     _path: Path | None
@@ -32,6 +37,8 @@ class Locales:
     def get(self, language: str) -> Locale | None:
         """Find locale for the given language.
         """
+        if self._bundle is not None:
+            return self._get_bundled(self._bundle, language)
         path = self._path_to(language)
         if path.exists():
             return Locale(path, language=language)
@@ -57,12 +64,16 @@ class Locales:
     def languages(self) -> frozenset[str]:
         """List all languages for which a locale is available in the catalog.
         """
+        if self._bundle is not None:
+            return self._bundle.languages
         return frozenset(locale.language for locale in self.locales)
 
     @cached_property
     def locales(self) -> tuple[Locale, ...]:
         """List all locales available in the catalog.
         """
+        if self._bundle is not None:
+            return self._bundle.locales
         locales = []
         for path in self.path.glob(self._pattern):
             locales.append(Locale(path))
@@ -80,8 +91,26 @@ class Locales:
     def system_language(self) -> str | None:
         """The current system language detected from env vars.
         """
+        import locale
         return locale.getdefaultlocale()[0]
 
+    def stats(self, *, load: bool = False) -> dict[str, dict[str, MemoryUsage]]:
+        """Report how much memory translations for each language take.
+
+        See `Locale.memory_usage` for what is reported for each language.
+
+        Args:
+            load: load all locales first. Otherwise, a locale is reported as loaded
+                only if some `Locale` object in the process has loaded it.
+        """
+        result = {}
+        for locale in self.locales:
+            if load:
+                # the catalog is loaded on the first access to the messages
+                locale._messages
+            result[self._get_language(locale)] = locale.memory_usage()
+        return dict(sorted(result.items()))
+
     def reset_cache(self) -> None:
         path = self._path
         format = self.format
@@ -91,12 +120,38 @@ class Locales:
 
     # PRIVATE
 
+    @cached_property
+    def _bundle(self) -> Bundle | None:
+        if not is_bundle(self.path):
+            return None
+        return Bundle(self.path)
+
+    @staticmethod
+    def _get_bundled(bundle: Bundle, language: str) -> Locale | None:
+        short_lang = language.split('_')[0].split('-')[0]
+        for name in (language, short_lang):
+            locale = bundle.get(name, language=language)
+            if locale is not None:
+                return locale
+        return None
+
+    def _get_language(self, locale: Locale) -> str:
+        """Get the language of the locale without loading it.
+        """
+        if locale._lang or locale.path is None:
+            return locale.language
+        prefix, _, suffix = self.format.partition('{language}')
+        name = locale.path.relative_to(self.path).as_posix()
+        return name[len(prefix):len(name) - len(suffix)]
+
     def _path_to(self, language: str) -> Path:
         parts = self.format.format(language=language).split('/')
         return self.path.joinpath(*parts)
 
     @cached_property
     def _rex(self) -> re.Pattern:
+        import fnmatch
+        import re
         return re.compile(fnmatch.translate(self._pattern))
 
     @cached_property
@@ -105,16 +160,19 @@ class Locales:
 
     @staticmethod
     def _find_catalog() -> Path:
-        for frame in inspect.stack():
-            if frame.filename == __file__:
+        # Walk the raw frames instead of using `inspect.stack`,
+        # which reads the source code for every frame on the stack.
+        frame: FrameType | None = sys._getframe(1)
+        while frame is not None:
+            file_name = frame.f_code.co_filename
+            frame = frame.f_back
+            if file_name == __file__:
                 continue
-            file_path = Path(frame.filename)
-            if file_path.name == 'functools.py':
+            if os.path.basename(file_name) == 'functools.py':
                 continue
-            for dir_path in file_path.parents:
-                catalog_path = dir_path / 'locales'
-                if dir_path.exists():
-                    return catalog_path
+            catalog_path = _get_catalog_path(file_name)
+            if catalog_path is not None:
+                return catalog_path
         raise FileNotFoundError('cannot find catalog')
 
     # MAGIC
@@ -131,3 +189,15 @@ class Locales:
         """Iterate thorugh all compiled locales.
         """
         yield from self.locales
+
+
+@lru_cache(maxsize=None)
+def _get_catalog_path(file_name: str) -> Path | None:
+    """The default catalog path for the module with the given file name.
+
+    The result is cached, so the file system is checked only once for each module.
+    """
+    for dir_path in Path(file_name).parents:
+        if dir_path.exists():
+            return dir_path / 'locales'
+    return None
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable, NamedTuple
+
+
+REX_SPACES = re.compile(r'\s+')
+# placeholders like "{name}", words, and numbers
+REX_TOKENS = re.compile(r'\{[^{}]*\}|[^\W_]+')
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS translations (
+    src TEXT NOT NULL,
+    dest TEXT NOT NULL,
+    key TEXT NOT NULL,
+    skeleton TEXT NOT NULL,
+    source TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    PRIMARY KEY (src, dest, key)
+);
+CREATE INDEX IF NOT EXISTS translations_skeleton
+    ON translations (src, dest, skeleton);
+"""
+
+
+class Match(NamedTuple):
+    # the message for which the translation was stored
+    source: str
+    translation: str
+
+
+def normalize(text: str) -> str:
+    """Normalize the message for exact lookups.
+
+    Only whitespace is normalized, everything else affects the translation.
+    """
+    return REX_SPACES.sub(' ', text).strip()
+
+
+def get_skeleton(text: str) -> str:
+    """Normalize the message for near-duplicate lookups.
+
+    Case of words and punctuation are ignored, so "Hello, {name}!"
+    and "hello {name}" have the same skeleton. Numbers and placeholders
+    are kept as is because they change the meaning of the translation.
+    """
+    tokens = REX_TOKENS.findall(text)
+    return ' '.join(t if t.startswith('{') else t.lower() for t in tokens)
+
+
+class TranslationMemory:
+    """Machine translations made before, stored in SQLite database.
+
+    The same database can be shared by multiple projects.
+    """
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        self._db.executescript(SCHEMA)
+
+    def get(self, text: str, *, src: str, dest: str) -> str | None:
+        """Find the translation for exactly the same message.
+        """
+        row = self._db.execute(
+            'SELECT translation FROM translations WHERE src = ? AND dest = ? AND key = ?',
+            (src, dest, normalize(text)),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def find_similar(self, text: str, *, src: str, dest: str) -> Match | None:
+        """Find the translation for a message that differs only in punctuation or case.
+        """
+        skeleton = get_skeleton(text)
+        if not skeleton:
+            return None
+        rows = self._db.execute(
+            'SELECT source, translation FROM translations '
+            'WHERE src = ? AND dest = ? AND skeleton = ?',
+            (src, dest, skeleton),
+        )
+        for source, translation in rows:
+            # The stored skeleton may be computed by an older version
+            # that ignored numbers and placeholders.
+            if get_skeleton(source) == skeleton:
+                return Match(source, translation)
+        return None
+
+    def add(self, translations: Iterable[tuple[str, str]], *, src: str, dest: str) -> None:
+        """Remember translations for the given messages.
+        """
+        with self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?, ?)',
+                [
+                    (src, dest, normalize(text), get_skeleton(text), text, translation)
+                    for text, translation in translations
+                ],
+            )
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> TranslationMemory:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Iterable
+
+import polib
+
+
+def merge_duplicates(entries: Iterable[polib.POEntry]) -> list[polib.POEntry]:
+    """Merge entries with the same msgctxt and msgid into one entry.
+
+    Occurrences, comments, and flags of all duplicates are combined
+    in the first entry. The order of entries is preserved.
+    """
+    index: dict[str, polib.POEntry] = {}
+    for entry in entries:
+        key = entry.msgid_with_context
+        first = index.get(key)
+        if first is None:
+            index[key] = entry
+            continue
+        for occurrence in entry.occurrences:
+            if occurrence not in first.occurrences:
+                first.occurrences.append(occurrence)
+        if entry.comment and entry.comment not in first.comment.split('\n'):
+            first.comment = f'{first.comment}\n{entry.comment}'.lstrip('\n')
+        for flag in entry.flags:
+            if flag not in first.flags:
+                first.flags.append(flag)
+        if not first.msgid_plural:
+            first.msgid_plural = entry.msgid_plural
+    return list(index.values())
+
+
+def merge_catalog(
+    target: polib.POFile,
+    template: Iterable[polib.POEntry], *,
+    check_for_duplicates: bool = True,
+) -> None:
+    """Update the target catalog with entries from the template, like msgmerge.
+
+    Works the same as `polib.POFile.merge` but in linear time:
+
+    * Existing translations, translator comments, and fuzzy flags are preserved.
+    * Occurrences, extracted comments, and other flags are taken from the template.
+    * Entries that aren't in the template are marked as obsolete.
+    * Entries from the template that aren't in the target are added in the end.
+      The template entries are not copied, so don't modify them afterwards.
+
+    Args:
+        target: the catalog to update, usually read from an existing PO file.
+        template: entries without duplicates, see `merge_duplicates`.
+        check_for_duplicates: raise ValueError if the target has duplicate entries.
+    """
+    index: dict[str, polib.POEntry] = {}
+    for entry in target:
+        key = entry.msgid_with_context
+        old = index.get(key)
+        if old is not None:
+            if check_for_duplicates and not old.obsolete and not entry.obsolete:
+                raise ValueError(f'Entry "{entry.msgid}" already exists')
+            if entry.obsolete:
+                continue
+        index[key] = entry
+
+    entries = list(target)
+    seen = set()
+    for new in template:
+        key = new.msgid_with_context
+        seen.add(key)
+        old = index.get(key)
+        if old is None:
+            entries.append(new)
+        else:
+            old.merge(new)
+    for entry in entries:
+        if entry.msgid_with_context not in seen:
+            entry.obsolete = True
+    # Assign the list directly, bypassing the quadratic duplicates check
+    # in `POFile.append`.
+    target[:] = entries
@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import NamedTuple
+
+
+class Message(NamedTuple):
+    text: str
+    line: int
+    column: int
+    n: int | None
+    context: str | None
+    comment: str | None
+    plural: str | None
+    file_name: str
+
+    @property
+    def path(self) -> Path:
+        return Path(self.file_name)
@@ -0,0 +1,413 @@
+from __future__ import annotations
+
+import codecs
+import re
+import struct
+from dataclasses import dataclass, field
+from io import BytesIO
+from pathlib import Path
+from typing import (
+    BinaryIO, Container, Iterable, Iterator, Mapping, NamedTuple, Optional,
+    Tuple,
+)
+
+
+MAGIC = 0x950412de
+REX_CHARSET = re.compile(rb'charset=([\w\-:.]+)')
+# C escape sequences, the same as GNU gettext supports in PO files.
+ESCAPES = {
+    'a': '\a', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t', 'v': '\v',
+    '\\': '\\', '"': '"', "'": "'", '?': '?',
+}
+# A single-character escape or a run of octal and hex escapes (bytes).
+REX_ESCAPE = re.compile(
+    r'\\([abfnrtv\\"\'?])|((?:\\(?:[0-7]{1,3}|x[0-9a-fA-F]{1,2}))+)',
+)
+
+
+# The context and the text of a message used in the code.
+MessageID = Tuple[Optional[str], str]
+
+
+class POContent(NamedTuple):
+    # encoded keys and values for the MO file, including the header
+    pairs: dict[bytes, bytes]
+    # the number of translated entries in pairs
+    translated: int
+    # translated entries left out because they aren't used in the code
+    pruned: dict[bytes, bytes]
+
+
+class Compiled(NamedTuple):
+    # the number of translated entries included into the MO file
+    translated: int
+    # the number of translated entries left out because they aren't used in the code
+    pruned: int = 0
+    # how much smaller the MO file is because of the pruned entries
+    saved: int = 0
+
+
+@dataclass
+class Entry:
+    """A single message from a PO file, as much as needed for compiling it.
+    """
+    msgid: str = ''
+    msgctxt: str | None = None
+    msgid_plural: str | None = None
+    msgstr: str = ''
+    msgstr_plural: dict[int, str] = field(default_factory=dict)
+    flags: list[str] = field(default_factory=list)
+
+    @property
+    def fuzzy(self) -> bool:
+        return 'fuzzy' in self.flags
+
+    @property
+    def translated(self) -> bool:
+        """The same as `polib.POEntry.translated` but doesn't care about fuzzy flag.
+        """
+        if self.msgstr:
+            return True
+        if self.msgstr_plural:
+            return all(self.msgstr_plural.values())
+        return False
+
+    @property
+    def key(self) -> str:
+        key = self.msgid
+        if self.msgid_plural is not None:
+            key = f'{key}\x00{self.msgid_plural}'
+        if self.msgctxt is not None:
+            key = f'{self.msgctxt}\x04{key}'
+        return key
+
+    @property
+    def value(self) -> str:
+        if self.msgid_plural is None:
+            return self.msgstr
+        return '\x00'.join(self.msgstr_plural[i] for i in sorted(self.msgstr_plural))
+
+
+def compile_po(
+    po_path: Path,
+    mo_path: Path, *,
+    fuzzy: bool = True,
+    allow_empty: bool = False,
+    hash_table: bool = False,
+) -> int | None:
+    """Compile the PO file into the MO file without building the whole polib catalog.
+
+    The PO file is parsed line by line, and only translated messages are kept
+    in memory, already encoded. The header entry is always included.
+
+    Args:
+        fuzzy: include translations marked as fuzzy.
+        allow_empty: write the MO file even if there are no translations.
+        hash_table: include the GNU gettext hash table for faster lookups.
+
+    Returns the number of translated entries or None if there are none
+    (and so the file isn't written).
+    """
+    pairs, translated, _ = read_po(po_path, fuzzy=fuzzy)
+    if not translated and not allow_empty:
+        return None
+    with mo_path.open('wb') as stream:
+        write_mo(stream, pairs.items(), hash_table=hash_table)
+    return translated
+
+
+def build_mo(
+    po_path: Path, *,
+    fuzzy: bool = True,
+    allow_empty: bool = False,
+    hash_table: bool = False,
+    keep: Container[MessageID] | None = None,
+) -> tuple[Compiled, bytes] | None:
+    """The same as `compile_po` but returns the content of the MO file.
+
+    Args:
+        keep: if specified, only translations for these messages are included.
+            See `read_po`.
+    """
+    content = read_po(po_path, fuzzy=fuzzy, keep=keep)
+    if not content.translated and not allow_empty:
+        return None
+    stream = BytesIO()
+    write_mo(stream, content.pairs.items(), hash_table=hash_table)
+    mo = stream.getvalue()
+    compiled = Compiled(content.translated)
+    if content.pruned:
+        full_size = get_mo_size({**content.pairs, **content.pruned}, hash_table=hash_table)
+        compiled = Compiled(content.translated, len(content.pruned), full_size - len(mo))
+    return compiled, mo
+
+
+def read_po(
+    po_path: Path, *,
+    fuzzy: bool = True,
+    keep: Container[MessageID] | None = None,
+) -> POContent:
+    """Read encoded keys and values for the MO file from the PO file.
+
+    Args:
+        fuzzy: include translations marked as fuzzy.
+        keep: if specified, translations for messages not in it are left out.
+            Messages are identified by the context and the text (msgid).
+    """
+    encoding = detect_encoding(po_path)
+    pairs: dict[bytes, bytes] = {b'': b''}
+    pruned: dict[bytes, bytes] = {}
+    with po_path.open(encoding=encoding) as stream:
+        for entry in parse_po(stream, encoding=encoding):
+            if entry.msgid == '' and entry.msgctxt is None:
+                pairs[b''] = entry.msgstr.encode(encoding)
+                continue
+            if not entry.translated:
+                continue
+            if entry.fuzzy and not fuzzy:
+                continue
+            key = entry.key.encode(encoding)
+            value = entry.value.encode(encoding)
+            if keep is not None and (entry.msgctxt, entry.msgid) not in keep:
+                pruned[key] = value
+                continue
+            pairs[key] = value
+    # Duplicate entries are counted once, the last one wins.
+    return POContent(pairs, len(pairs) - 1, pruned)
+
+
+def detect_encoding(po_path: Path) -> str:
+    """Find the charset specified in the header of the PO file.
+
+    Falls back to UTF-8 if there is no charset or it isn't supported by Python.
+    """
+    started = False
+    with po_path.open('rb') as stream:
+        for line in stream:
+            # the header is the first entry, so it ends on the first empty line
+            if not line.strip():
+                if started:
+                    break
+                continue
+            started = True
+            match = REX_CHARSET.search(line)
+            if match is None:
+                continue
+            charset = match.group(1).decode('ascii')
+            try:
+                codecs.lookup(charset)
+            except LookupError:
+                break
+            return charset
+    return 'utf-8'
+
+
+def parse_po(lines: Iterable[str], *, encoding: str = 'utf-8') -> Iterator[Entry]:
+    """Parse PO file line by line.
+
+    Obsolete entries (`#~`) and comments are skipped.
+    The encoding of the file is used to decode octal and hex escapes.
+    """
+    entry = Entry()
+    # the strings of the field that is currently being read
+    parts: list[str] = []
+    # the name of the field and the index for plural forms
+    current: tuple[str, int] = ('', 0)
+    has_msgstr = False
+
+    def flush() -> None:
+        if not current[0]:
+            return
+        # Escapes are decoded after joining the strings because bytes
+        # of one character may be split between lines.
+        value = _unescape(''.join(parts), encoding)
+        name, index = current
+        if name == 'msgstr_plural':
+            entry.msgstr_plural[index] = value
+        else:
+            setattr(entry, name, value)
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        # string continuation
+        if line[0] == '"':
+            parts.append(_unquote(line))
+            continue
+
+        flush()
+        parts = []
+        current = ('', 0)
+
+        if line[0] == '#':
+            if has_msgstr:
+                yield entry
+                entry = Entry()
+                has_msgstr = False
+            if line.startswith('#~'):
+                # Flags of an obsolete entry must not leak into the next one.
+                entry.flags.clear()
+            elif line.startswith('#,'):
+                entry.flags.extend(f.strip() for f in line[2:].split(','))
+            continue
+
+        keyword, _, rest = line.partition(' ')
+        if keyword in ('msgctxt', 'msgid') and has_msgstr:
+            yield entry
+            entry = Entry()
+            has_msgstr = False
+        if keyword.startswith('msgstr['):
+            current = ('msgstr_plural', int(keyword[7:-1]))
+            has_msgstr = True
+        elif keyword in ('msgctxt', 'msgid', 'msgid_plural', 'msgstr'):
+            current = (keyword, 0)
+            has_msgstr = has_msgstr or keyword == 'msgstr'
+        else:
+            raise ValueError(f'unexpected line in PO file: {line}')
+        parts.append(_unquote(rest.strip()))
+
+    flush()
+    if has_msgstr:
+        yield entry
+
+
+def write_mo(
+    stream: BinaryIO,
+    pairs: Iterable[tuple[bytes, bytes]], *,
+    hash_table: bool = False,
+) -> None:
+    """Write the MO file with the given encoded keys and values.
+
+    If `hash_table` is True, the GNU gettext hash table is included,
+    so that readers can find a message without a binary search.
+    """
+    # keys must be sorted, gettext uses binary search when there is no hash table
+    items = sorted(pairs)
+    count = len(items)
+    keys_start = 7 * 4
+    values_start = keys_start + count * 8
+    table: list[int] = []
+    if hash_table:
+        table = make_hash_table([key for key, _ in items])
+    table_start = values_start + count * 8
+    data_start = table_start + len(table) * 4
+
+    keys_table: list[int] = []
+    values_table: list[int] = []
+    offset = data_start
+    for key, _ in items:
+        keys_table.extend((len(key), offset))
+        offset += len(key) + 1
+    for _, value in items:
+        values_table.extend((len(value), offset))
+        offset += len(value) + 1
+
+    stream.write(struct.pack(
+        '<7I',
+        MAGIC,
+        0,                          # version
+        count,
+        keys_start,
+        values_start,
+        len(table), table_start,    # size and offset of the hash table
+    ))
+    stream.write(struct.pack(f'<{count * 2}I', *keys_table))
+    stream.write(struct.pack(f'<{count * 2}I', *values_table))
+    stream.write(struct.pack(f'<{len(table)}I', *table))
+    for key, _ in items:
+        stream.write(key + b'\x00')
+    for _, value in items:
+        stream.write(value + b'\x00')
+
+
+def get_mo_size(pairs: Mapping[bytes, bytes], *, hash_table: bool = False) -> int:
+    """The size of the MO file that `write_mo` writes for the given pairs.
+    """
+    count = len(pairs)
+    table_size = max(3, next_prime(count * 4 // 3)) if hash_table else 0
+    data_size = sum(len(key) + len(value) + 2 for key, value in pairs.items())
+    return 7 * 4 + count * 16 + table_size * 4 + data_size
+
+
+def make_hash_table(keys: list[bytes]) -> list[int]:
+    """Build the hash table in the same way as GNU msgfmt does.
+
+    The table size is the smallest prime that is at least 4/3 of the number
+    of keys (but not less than 3). Each slot holds 1 + the index of the key
+    in the (sorted) keys table or 0 for empty slots. Collisions are resolved
+    with double hashing.
+    """
+    size = max(3, next_prime(len(keys) * 4 // 3))
+    table = [0] * size
+    for index, key in enumerate(keys):
+        hval = hash_key(key)
+        slot = hval % size
+        incr = 1 + hval % (size - 2)
+        while table[slot]:
+            slot = (slot + incr) % size
+        table[slot] = index + 1
+    return table
+
+
+def hash_key(key: bytes) -> int:
+    """The hashpjw function used by GNU gettext for MO hash tables.
+
+    Like in gettext, only the part before the first NUL byte is hashed,
+    so plural messages are found by their singular form.
+    """
+    hval = 0
+    for char in key.partition(b'\x00')[0]:
+        hval = ((hval << 4) + char) & 0xffffffff
+        high = hval & 0xf0000000
+        if high:
+            hval ^= high >> 24
+            hval ^= high
+    return hval
+
+
+def next_prime(seed: int) -> int:
+    """The smallest odd prime that is greater or equal to the seed.
+    """
+    seed |= 1
+    while not _is_prime(seed):
+        seed += 2
+    return seed
+
+
+def _is_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    divisor = 3
+    while divisor * divisor <= n:
+        if n % divisor == 0:
+            return False
+        divisor += 2
+    return True
+
+
+def _unquote(text: str) -> str:
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        raise ValueError(f'invalid string in PO file: {text}')
+    return text[1:-1]
+
+
+def _unescape(text: str, encoding: str) -> str:
+    if '\\' not in text:
+        return text
+
+    def replace(match: re.Match) -> str:
+        if match.group(1) is not None:
+            return ESCAPES[match.group(1)]
+        # Octal and hex escapes are bytes in the encoding of the file,
+        # like msgfmt reads them: "\303\251" is "é" in UTF-8.
+        raw = bytearray()
+        for code in match.group(2).split('\\')[1:]:
+            if code[0] == 'x':
+                raw.append(int(code[1:], 16))
+            else:
+                raw.append(int(code, 8))
+        return raw.decode(encoding)
+
+    return REX_ESCAPE.sub(replace, text)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import NamedTuple
+import re
+from typing import Any, Callable, NamedTuple
 
 
 class Plural(NamedTuple):
@@ -88,3 +89,123 @@ PLURALS = {
     'wo':       SINGULAR,
     'zh':       FRENCH,
 }
+
+
+REX_TOKEN = re.compile(r'\s*(\d+|n|&&|\|\||==|!=|<=|>=|[-+*/%<>!?:()])')
+# Binary operators from the lowest to the highest priority.
+# Each item is a C operator, Python operator, and if the result is boolean.
+BINARY = (
+    (('||', '|', True),),
+    (('&&', '&', True),),
+    (('==', '==', True), ('!=', '!=', True)),
+    (('<', '<', True), ('>', '>', True), ('<=', '<=', True), ('>=', '>=', True)),
+    (('+', '+', False), ('-', '-', False)),
+    (('*', '*', False), ('/', '//', False), ('%', '%', False)),
+)
+
+
+def compile_plural_many(expr: str) -> Callable[[Any], Any]:
+    """Convert C expression from `Plural-Forms` into a function working on arrays.
+
+    The returned function accepts a numpy array of counts and returns
+    an array of plural form indices. It gives the same results as
+    `gettext.c2py` applied to each count. Requires numpy to be installed.
+    """
+    import numpy
+
+    tokens = REX_TOKEN.findall(expr)
+    if ''.join(tokens) != re.sub(r'\s+', '', expr):
+        raise ValueError(f'invalid plural forms expression: {expr}')
+    parser = _PluralParser(tokens)
+    source, _ = parser.parse_ternary()
+    if parser.tokens:
+        raise ValueError(f'invalid plural forms expression: {expr}')
+    code = compile(f'lambda n: {source}', '<plural>', 'eval')
+    func = eval(code, {'np': numpy})
+
+    def plural_many(counts: Any) -> Any:
+        counts = numpy.asarray(counts, dtype=numpy.int64)
+        result = numpy.asarray(func(counts), dtype=numpy.int64)
+        return numpy.broadcast_to(result, counts.shape).copy()
+    return plural_many
+
+
+class _PluralParser:
+    """Recursive descent parser converting C expression into numpy expression.
+
+    Each method returns Python source code and if the result is boolean.
+    """
+    def __init__(self, tokens: list[str]) -> None:
+        self.tokens = tokens[::-1]
+
+    def parse_ternary(self) -> tuple[str, bool]:
+        cond, is_bool = self.parse_binary(0)
+        if not self._next_is('?'):
+            return cond, is_bool
+        self._expect('?')
+        if_true, true_is_bool = self.parse_ternary()
+        self._expect(':')
+        if_false, false_is_bool = self.parse_ternary()
+        cond = _as_bool(cond, is_bool)
+        return f'np.where({cond}, {if_true}, {if_false})', true_is_bool and false_is_bool
+
+    def parse_binary(self, level: int) -> tuple[str, bool]:
+        if level == len(BINARY):
+            return self.parse_unary()
+        left, left_is_bool = self.parse_binary(level + 1)
+        while True:
+            for c_op, py_op, is_bool in BINARY[level]:
+                if self._next_is(c_op):
+                    break
+            else:
+                return left, left_is_bool
+            self._expect(c_op)
+            right, right_is_bool = self.parse_binary(level + 1)
+            if py_op in ('&', '|'):
+                left = _as_bool(left, left_is_bool)
+                right = _as_bool(right, right_is_bool)
+            else:
+                left = _as_int(left, left_is_bool)
+                right = _as_int(right, right_is_bool)
+            left = f'({left} {py_op} {right})'
+            left_is_bool = is_bool
+
+    def parse_unary(self) -> tuple[str, bool]:
+        if self._next_is('!'):
+            self._expect('!')
+            operand, is_bool = self.parse_unary()
+            return f'(~{_as_bool(operand, is_bool)})', True
+        if self._next_is('('):
+            self._expect('(')
+            result = self.parse_ternary()
+            self._expect(')')
+            return result
+        token = self._pop()
+        if token != 'n' and not token.isdigit():
+            raise ValueError(f'unexpected token in plural forms expression: {token}')
+        return token, False
+
+    def _next_is(self, token: str) -> bool:
+        return bool(self.tokens) and self.tokens[-1] == token
+
+    def _expect(self, token: str) -> None:
+        actual = self._pop()
+        if actual != token:
+            raise ValueError(f'expected {token} in plural forms expression, got {actual}')
+
+    def _pop(self) -> str:
+        if not self.tokens:
+            raise ValueError('unexpected end of plural forms expression')
+        return self.tokens.pop()
+
+
+def _as_bool(source: str, is_bool: bool) -> str:
+    if is_bool:
+        return source
+    return f'({source} != 0)'
+
+
+def _as_int(source: str, is_bool: bool) -> str:
+    if not is_bool:
+        return source
+    return f'np.asarray({source}, dtype=np.int64)'
@@ -123,6 +123,45 @@ class Project:
     def mo_root(self) -> Path:
         return self.package_path / self.mo_dir
 
+    @cached_property
+    def bundle_path(self) -> Path:
+        """Path to the file with all languages produced by `l10n compile --bundle`.
+        """
+        return self.mo_root.with_name(f'{self.mo_root.name}.bundle')
+
+    @cached_property
+    def locale_names(self) -> frozenset[str]:
+        """Names of variables and attributes that always hold a `Locale` instance.
+
+        Used by the AST extractor to find messages without type inference.
+        """
+        with suppress(KeyError):
+            return frozenset(self._meta['tool']['l10n']['locale_names'])
+        return frozenset()
+
+    @cached_property
+    def cache_dir(self) -> str:
+        """Name of the directory in the project root dir where l10n keeps its cache.
+        """
+        with suppress(KeyError):
+            return self._meta['tool']['l10n']['cache_dir']
+        return '.l10n_cache'
+
+    @cached_property
+    def cache_root(self) -> Path:
+        return self.root / self.cache_dir
+
+    @cached_property
+    def translation_memory(self) -> Path:
+        """Path to the SQLite database where `l10n translate` keeps machine translations.
+
+        Point it to the same file in multiple projects to share translations.
+        """
+        with suppress(KeyError):
+            path = Path(self._meta['tool']['l10n']['translation_memory'])
+            return self.root / path.expanduser()
+        return self.cache_root / 'translations.sqlite3'
+
     @cached_property
     def package_path(self) -> Path:
         """Path to the Python source code of the project.
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Iterator
+
+
+# Directories that mypy skips when looking for source files.
+SKIP_DIRS = frozenset({'__pycache__', 'site-packages', 'node_modules'})
+
+
+def find_sources(path: Path) -> Iterator[Path]:
+    """Find all Python files in the given directory.
+
+    Skips the same directories as mypy does.
+    """
+    if not path.is_dir():
+        yield path
+        return
+    for file_path in sorted(path.rglob('*.py')):
+        parts = file_path.relative_to(path).parts
+        if any(part.startswith('.') or part in SKIP_DIRS for part in parts):
+            continue
+        yield file_path
+
+
+def get_file_name(path: str | Path) -> str:
+    """The name of the source file as it's used in messages and caches.
+
+    The same file may be reported as `pkg/mod.py`, `./pkg/mod.py`,
+    or `pkg/../pkg/mod.py` depending on how the path was passed to mypy.
+    """
+    return os.path.normpath(path)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+from functools import cached_property
+from pathlib import Path
+
+from ._project import Project
+from ._sources import SKIP_DIRS
+
+
+class Workspace:
+    """A directory with one or more projects, like a monorepo.
+
+    Project roots are looked up once per directory, and each project
+    is created (and so reads its `pyproject.toml`) only once.
+    """
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        # (directory, marker) -> the closest directory containing the marker
+        self._markers: dict[tuple[Path, str], Path | None] = {}
+        self._projects: dict[Path, Project] = {}
+
+    @cached_property
+    def projects(self) -> tuple[Project, ...]:
+        """All projects in the workspace that have PO files.
+
+        A project is a directory with `pyproject.toml`.
+        Hidden directories and directories skipped by mypy are not scanned.
+        """
+        projects = []
+        for dir_name, dir_names, file_names in os.walk(self.root):
+            dir_names[:] = sorted(
+                name for name in dir_names
+                if not name.startswith('.') and name not in SKIP_DIRS
+            )
+            if 'pyproject.toml' not in file_names:
+                continue
+            project = self.get_project(Path(dir_name))
+            if project.po_root.is_dir():
+                projects.append(project)
+        return tuple(projects)
+
+    def get_project(self, root: Path) -> Project:
+        """Get the project with the given root, creating it only once.
+        """
+        project = self._projects.get(root)
+        if project is None:
+            project = Project(root)
+            self._projects[root] = project
+        return project
+
+    def find_root(self, file_path: Path) -> Path:
+        """Find the root of the project the file belongs to.
+
+        Works the same as `find_project_root` for files but remembers
+        the result for every directory on the way.
+        """
+        dir_path = file_path.absolute().parent
+        root = self._find_marker(dir_path, 'pyproject.toml')
+        if root is None:
+            root = self._find_marker(dir_path, '.git')
+        if root is None:
+            return Path()
+        return root
+
+    def _find_marker(self, dir_path: Path, marker: str) -> Path | None:
+        key = (dir_path, marker)
+        if key in self._markers:
+            return self._markers[key]
+        path = dir_path / marker
+        found = path.is_file() if marker == 'pyproject.toml' else path.is_dir()
+        result: Path | None
+        if found:
+            result = dir_path
+        elif dir_path.parent == dir_path:
+            result = None
+        else:
+            result = self._find_marker(dir_path.parent, marker)
+        self._markers[key] = result
+        return result
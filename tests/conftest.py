@@ -1,5 +1,9 @@
+from __future__ import annotations
+
 from pathlib import Path
+from typing import Callable
 
+import polib
 import pytest
 
 
@@ -18,3 +22,19 @@ def source_path(project_root: Path) -> Path:
     path = (project_root / 'project_test' / 'core.py')
     path.write_text('')
     return path
+
+
+@pytest.fixture
+def write_po() -> Callable[..., Path]:
+    """Save a UTF-8 PO file with the given entries, creating the directory for it.
+    """
+    def write(path: Path, *entries: polib.POEntry, language: str | None = None) -> Path:
+        po_file = polib.POFile(encoding='UTF-8')
+        po_file.metadata['Content-Type'] = 'text/plain; charset=UTF-8'
+        if language is not None:
+            po_file.metadata['Language'] = language
+        po_file.extend(entries)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        po_file.save(str(path))
+        return path
+    return write
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Sequence
+
+import pytest
+
+from l10n._backends import Backend, BatchTranslator, load_backend
+
+
+class FakeBackend(Backend):
+    batch_size = 2
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+        self.requests: list[tuple[str, list[str]]] = []
+        self.running = 0
+        self.max_running = 0
+
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        self.requests.append((dest, list(texts)))
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(.01)
+            if self.failures:
+                self.failures -= 1
+                raise ConnectionError
+            return [f'{dest}: {text}' for text in texts]
+        finally:
+            self.running -= 1
+
+
+def translate(translator: BatchTranslator, messages: dict[str, list[str]]):
+    return asyncio.run(translator.translate(messages, src='en'))
+
+
+def test_batch_translator():
+    backend = FakeBackend()
+    translator = BatchTranslator(backend=backend, concurrency=2)
+    result = translate(translator, {
+        'ru': ['a', 'b', 'a', 'c'],
+        'nl': ['a'],
+    })
+    assert result == {
+        'ru': {'a': 'ru: a', 'b': 'ru: b', 'c': 'ru: c'},
+        'nl': {'a': 'nl: a'},
+    }
+    assert sorted(backend.requests) == [('nl', ['a']), ('ru', ['a', 'b']), ('ru', ['c'])]
+    assert backend.max_running == 2
+
+
+def test_batch_translator__retry():
+    backend = FakeBackend(failures=2)
+    translator = BatchTranslator(backend=backend, concurrency=1, backoff=0)
+    result = translate(translator, {'ru': ['a']})
+    assert result == {'ru': {'a': 'ru: a'}}
+    assert len(backend.requests) == 3
+
+    backend = FakeBackend(failures=10)
+    translator = BatchTranslator(backend=backend, retries=1, backoff=0)
+    result = translate(translator, {'ru': ['a', 'b', 'c']})
+    assert result == {'ru': {'a': None, 'b': None, 'c': None}}
+    assert len(backend.requests) == 4
+
+
+def test_batch_translator__errors():
+    errors: list[tuple[str, list[str], Exception | None]] = []
+
+    def on_batch(dest, translations, error):
+        errors.append((dest, list(translations), error))
+
+    async def run(backend: Backend) -> None:
+        translator = BatchTranslator(backend=backend, concurrency=1, retries=1, backoff=0)
+        await translator.translate({'ru': ['a', 'b', 'c']}, src='en', on_batch=on_batch)
+
+    # both attempts for the first batch fail, the second batch succeeds on retry
+    asyncio.run(run(FakeBackend(failures=3)))
+    assert [(dest, texts) for dest, texts, _ in errors] == [('ru', ['a', 'b']), ('ru', ['c'])]
+    assert isinstance(errors[0][2], ConnectionError)
+    assert errors[1][2] is None
+
+    errors.clear()
+    asyncio.run(run(ShortBackend()))
+    assert len(errors) == 1
+    assert isinstance(errors[0][2], ValueError)
+    assert str(errors[0][2]) == 'expected 3 translations, got 1'
+
+
+def test_backend__abstract():
+    with pytest.raises(TypeError):
+        Backend()  # type: ignore[abstract]
+
+
+def test_batch_translator__rate():
+    backend = FakeBackend()
+    translator = BatchTranslator(backend=backend, concurrency=10, rate=50)
+
+    async def run() -> float:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await translator.translate({'ru': list('abcdefgh')}, src='en')
+        return loop.time() - start
+
+    # 4 requests, the first one starts immediately
+    assert asyncio.run(run()) >= 3 / 50
+
+
+def test_load_backend():
+    backend = load_backend('tests.test_backends:FakeBackend')
+    assert isinstance(backend, FakeBackend)
+    with pytest.raises(ValueError):
+        load_backend('unknown')
+
+
+class InterruptedBackend(FakeBackend):
+    """Translates one message at a time and gets interrupted on the third one.
+    """
+    batch_size = 1
+
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        if len(self.requests) == 2:
+            raise KeyboardInterrupt
+        return await super().translate_batch(texts, src=src, dest=dest)
+
+
+class BrokenBackend(Backend):
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        raise ConnectionError('service unavailable')
+
+
+class ShortBackend(Backend):
+    """Returns fewer translations than requested.
+    """
+    async def translate_batch(
+        self,
+        texts: Sequence[str], *,
+        src: str,
+        dest: str,
+    ) -> list[str]:
+        return [f'{dest}: {texts[0]}']
@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from l10n import Locale, Locales
+from l10n._bundle import Bundle, is_bundle, read_plural_forms, write_bundle
+from l10n._mo import build_mo
+
+
+PLURAL_FORMS = {
+    'ru': 'nplurals=3; plural=(n%10==1 && n%100!=11 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);',
+    'nl': 'nplurals=2; plural=(n != 1);',
+}
+TRANSLATIONS = {'ru': ('кошка', 'кошки', 'кошек'), 'nl': ('kat', 'katten')}
+
+
+@pytest.fixture
+def bundle_path(tmp_path: Path) -> Path:
+    parts = []
+    for lang, forms in TRANSLATIONS.items():
+        po_path = tmp_path / f'{lang}.po'
+        msgstr = ''.join(f'msgstr[{i}] "{form}"\n' for i, form in enumerate(forms))
+        po_path.write_text(
+            'msgid ""\n'
+            'msgstr ""\n'
+            '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+            f'"Language: {lang}\\n"\n'
+            f'"Plural-Forms: {PLURAL_FORMS[lang]}\\n"\n'
+            '\n'
+            'msgid "cat"\n'
+            'msgid_plural "cats"\n'
+            f'{msgstr}',
+            encoding='utf8',
+        )
+        result = build_mo(po_path)
+        assert result is not None
+        parts.append((lang, result[1]))
+    path = tmp_path / 'locales.bundle'
+    write_bundle(path, parts)
+    return path
+
+
+def test_bundle(bundle_path: Path):
+    assert is_bundle(bundle_path)
+    assert not is_bundle(bundle_path.parent)
+    assert not is_bundle(bundle_path.parent / 'ru.po')
+
+    bundle = Bundle(bundle_path)
+    assert bundle.languages == {'ru', 'nl'}
+    assert bundle.plural_forms('ru') == PLURAL_FORMS['ru']
+    assert read_plural_forms(bundle.read('nl')) == PLURAL_FORMS['nl']
+    assert bundle.get('en') is None
+    locale = bundle.get('ru')
+    assert locale is not None
+    assert locale.language == 'ru'
+    assert locale.get('cat', plural='cats', n=22) == 'кошки'
+    assert locale == bundle.get('ru')
+    assert locale != bundle.get('nl')
+    # a plain locale with the bundle path is a different locale, from both sides
+    plain = Locale(bundle_path, language='ru')
+    assert locale != plain
+    assert plain != locale
+    assert len({locale, plain, bundle.get('ru')}) == 2
+
+
+def test_locales_from_bundle(bundle_path: Path):
+    locales = Locales(path=bundle_path)
+    assert locales.languages == {'ru', 'nl'}
+    assert [loc.language for loc in locales] == ['nl', 'ru']
+    assert locales['nl'].get('cat', plural='cats', n=2) == 'katten'
+    locale = locales['ru_RU']
+    assert locale.language == 'ru_RU'
+    assert locale.get('cat', plural='cats', n=5) == 'кошек'
+    locale.reset_cache()
+    assert locale.get('cat', plural='cats', n=1) == 'кошка'
+    assert locales.get('en') is None
+    with pytest.raises(KeyError):
+        locales['en']
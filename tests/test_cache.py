@@ -0,0 +1,101 @@
+from pathlib import Path
+
+from l10n._cache import MessageCache
+from l10n._message import Message
+
+
+def fake_extract(paths: list[Path]) -> list[Message]:
+    messages = []
+    for path in paths:
+        for line, text in enumerate(path.read_text().splitlines(), start=1):
+            messages.append(Message(
+                text=text, line=line, column=0, n=None,
+                context=None, comment=None, plural=None,
+                file_name=str(path),
+            ))
+    return messages
+
+
+def extract(tmp_path: Path, key: str = 'v1') -> tuple[list[str], list[Path]]:
+    analyzed: list[Path] = []
+
+    def f(paths: list[Path]) -> list[Message]:
+        analyzed.extend(paths)
+        return fake_extract(paths)
+
+    cache = MessageCache(tmp_path / 'cache' / 'messages.json', key=key)
+    cache.load()
+    sources = sorted(tmp_path.glob('*.py'))
+    messages = sorted(m.text for m in cache.extract(sources, f))
+    cache.save()
+    return messages, analyzed
+
+
+def test_analyze_only_changed(tmp_path: Path):
+    a_path = tmp_path / 'a.py'
+    b_path = tmp_path / 'b.py'
+    a_path.write_text('hello\n')
+    b_path.write_text('world\n')
+    assert extract(tmp_path) == (['hello', 'world'], [a_path, b_path])
+    assert extract(tmp_path) == (['hello', 'world'], [])
+
+    b_path.write_text('oh hi mark\n')
+    assert extract(tmp_path) == (['hello', 'oh hi mark'], [b_path])
+
+    b_path.write_text('')
+    assert extract(tmp_path) == (['hello'], [b_path])
+    assert extract(tmp_path) == (['hello'], [])
+
+
+def test_deleted_and_renamed(tmp_path: Path):
+    a_path = tmp_path / 'a.py'
+    b_path = tmp_path / 'b.py'
+    a_path.write_text('hello\n')
+    b_path.write_text('world\n')
+    extract(tmp_path)
+
+    b_path.unlink()
+    assert extract(tmp_path) == (['hello'], [])
+
+    c_path = tmp_path / 'c.py'
+    a_path.rename(c_path)
+    messages, analyzed = extract(tmp_path)
+    assert messages == ['hello']
+    assert analyzed == [c_path]
+
+
+def test_key_mismatch(tmp_path: Path):
+    a_path = tmp_path / 'a.py'
+    a_path.write_text('hello\n')
+    extract(tmp_path, key='v1')
+    assert extract(tmp_path, key='v1') == (['hello'], [])
+    assert extract(tmp_path, key='v2') == (['hello'], [a_path])
+
+
+def test_discard(tmp_path: Path):
+    a_path = tmp_path / 'a.py'
+    a_path.write_text('hello\n')
+    cache = MessageCache(tmp_path / 'cache' / 'messages.json', key='v1')
+    list(cache.extract([a_path], fake_extract))
+    cache.discard([str(a_path)])
+    cache.save()
+    assert extract(tmp_path) == (['hello'], [a_path])
+
+
+def test_replay(tmp_path: Path):
+    a_path = tmp_path / 'a.py'
+    b_path = tmp_path / 'b.py'
+    a_path.write_text('hello\n')
+    b_path.write_text('world\n')
+    cache = MessageCache(tmp_path / 'cache' / 'messages.json', key='v1')
+    messages = fake_extract([a_path, b_path])
+    analyzed = {str(a_path), str(b_path)}
+    assert list(cache.replay([a_path, b_path], messages, analyzed)) == messages
+
+    # b.py is not analyzed, so its messages are taken from the cache
+    # even if the file has changed.
+    a_path.write_text('oh hi mark\n')
+    b_path.write_text('')
+    messages = fake_extract([a_path])
+    result = list(cache.replay([a_path, b_path], messages, {str(a_path)}))
+    assert [m.text for m in result] == ['oh hi mark', 'world']
@@ -1,21 +1,17 @@
+from io import StringIO
 from pathlib import Path
 
 import polib
 import pytest
 
-from l10n import Locale
+from l10n import Locale, Locales
 from l10n._cli import main
 
 
 @pytest.fixture
-def compile(project_root: Path):
+def compile(project_root: Path, write_po):
     def f(*entries):
-        po_file = polib.POFile(encoding='UTF-8')
-        po_file.metadata['Content-Type'] = 'text/plain; charset=UTF-8'
-        po_file.extend(entries)
-        po_path = project_root / 'locales' / 'ru.po'
-        po_path.parent.mkdir(exist_ok=True)
-        po_file.save(str(po_path))
+        write_po(project_root / 'locales' / 'ru.po', *entries)
         code = main(['compile', '--path', str(project_root)])
         assert code == 0
         mo_file = project_root / 'project_test' / 'locales' / 'ru.mo'
@@ -34,3 +30,179 @@ def test_include_fuzzy(compile):
     e = polib.POEntry(msgid='hello world', msgstr='привет мир', flags=['fuzzy'])
     loc: Locale = compile(e)
     assert loc.get('hello world') == 'привет мир'
+
+
+def test_skip_up_to_date(compile, project_root: Path):
+    def run(*args: str) -> str:
+        stream = StringIO()
+        code = main(['compile', '--path', str(project_root), *args], stream=stream)
+        assert code == 0
+        return stream.getvalue()
+
+    e = polib.POEntry(msgid='hello world', msgstr='привет мир')
+    compile(e)
+    mo_path = project_root / 'project_test' / 'locales' / 'ru.mo'
+    mtime = mo_path.stat().st_mtime_ns
+
+    assert 'skipped: up to date' in run()
+    assert mo_path.stat().st_mtime_ns == mtime
+    assert 'included: 1' in run('--no-fuzzy')
+    assert 'skipped: up to date' in run('--no-fuzzy')
+    assert 'included: 1' in run('--no-fuzzy', '--force')
+
+    mo_path.unlink()
+    assert 'included: 1' in run('--no-fuzzy')
+    assert mo_path.exists()
+
+    e = polib.POEntry(msgid='hello world', msgstr='здравствуй мир')
+    loc: Locale = compile(e)
+    assert loc.get('hello world') == 'здравствуй мир'
+
+
+def test_compile_parallel(project_root: Path, write_po):
+    po_root = project_root / 'locales'
+    for lang in ('ru', 'nl', 'uk'):
+        write_po(po_root / f'{lang}.po', polib.POEntry(msgid='hello', msgstr=f'hello {lang}'))
+    polib.POFile().save(str(po_root / 'de.po'))
+
+    stream = StringIO()
+    code = main(['compile', '--path', str(project_root), '--jobs', '3'], stream=stream)
+    assert code == 1
+    assert stream.getvalue().split() == [
+        'de', 'no', 'translated', 'strings', 'found',
+        'nl', 'included:', '1',
+        'ru', 'included:', '1',
+        'uk', 'included:', '1',
+    ]
+    mo_root = project_root / 'project_test' / 'locales'
+    assert Locale(mo_root / 'uk.mo').get('hello') == 'hello uk'
+
+
+def test_compile_hash_table(compile, project_root: Path):
+    e = polib.POEntry(msgid='hello world', msgstr='привет мир')
+    compile(e)
+    mo_path = project_root / 'project_test' / 'locales' / 'ru.mo'
+    stream = StringIO()
+    code = main(['compile', '--path', str(project_root), '--hash-table'], stream=stream)
+    assert code == 0
+    assert 'included: 1' in stream.getvalue()
+    # the smallest allowed hash table size, 3 slots
+    assert mo_path.read_bytes()[20:24] == (3).to_bytes(4, 'little')
+    assert Locale(mo_path).get('hello world') == 'привет мир'
+
+
+def test_compile_bundle(project_root: Path, write_po):
+    po_root = project_root / 'locales'
+    for lang in ('ru', 'nl'):
+        write_po(po_root / f'{lang}.po', polib.POEntry(msgid='hello', msgstr=f'hello {lang}'))
+
+    def run() -> str:
+        stream = StringIO()
+        code = main(['compile', '--path', str(project_root), '--bundle'], stream=stream)
+        assert code == 0
+        return stream.getvalue()
+
+    assert run().split() == ['nl', 'included:', '1', 'ru', 'included:', '1']
+    bundle_path = project_root / 'project_test' / 'locales.bundle'
+    assert not (project_root / 'project_test' / 'locales').exists()
+    locales = Locales(path=bundle_path)
+    assert locales.languages == {'ru', 'nl'}
+    assert locales['ru'].get('hello') == 'hello ru'
+    assert run().count('skipped: up to date') == 2
+
+    po_file = polib.pofile(str(po_root / 'nl.po'))
+    po_file[0].msgstr = 'hallo'
+    po_file.save()
+    assert run().count('included: 1') == 2
+    assert Locales(path=bundle_path)['nl'].get('hello') == 'hallo'
+
+
+def test_compile_workspace(tmp_path: Path, write_po):
+    for name in ('alpha', 'beta'):
+        root = tmp_path / name
+        (root / name).mkdir(parents=True)
+        (root / name / '__init__.py').write_text('')
+        (root / 'pyproject.toml').write_text('')
+        entry = polib.POEntry(msgid='hello', msgstr=f'hello {name}')
+        write_po(root / 'locales' / 'ru.po', entry)
+
+    stream = StringIO()
+    code = main(['compile', '--path', str(tmp_path), '--workspace'], stream=stream)
+    assert code == 0
+    assert stream.getvalue().split() == [
+        'alpha:', 'ru', 'included:', '1',
+        'beta:', 'ru', 'included:', '1',
+    ]
+    mo_path = tmp_path / 'beta' / 'beta' / 'locales' / 'ru.mo'
+    assert Locale(mo_path).get('hello') == 'hello beta'
+
+
+def test_compile_prune(project_root: Path, source_path: Path, write_po):
+    source_path.write_text('from l10n import Locales\nLocales()["ru"].get("hello")\n')
+    po_path = write_po(
+        project_root / 'locales' / 'ru.po',
+        polib.POEntry(msgid='hello', msgstr='привет'),
+        polib.POEntry(msgid='unused', msgstr='неиспользуемый'),
+        polib.POEntry(msgid='old', msgstr='старый', obsolete=True),
+    )
+    po_content = po_path.read_text()
+    mo_path = project_root / 'project_test' / 'locales' / 'ru.mo'
+
+    def run(*args: str) -> list[str]:
+        stream = StringIO()
+        code = main(['compile', '--path', str(project_root), *args], stream=stream)
+        assert code == 0
+        return stream.getvalue().split()
+
+    assert run() == ['ru', 'included:', '2']
+    full_size = mo_path.stat().st_size
+    output = run('--prune')
+    saved = full_size - mo_path.stat().st_size
+    assert saved > 0
+    assert output == [
+        'ru', 'included:', '1', 'pruned:', '1', f'({saved}', 'bytes', 'saved)',
+    ]
+    loc = Locale(mo_path)
+    assert loc.get('hello') == 'привет'
+    assert loc.get('unused') == 'unused'
+    # PO files are not changed
+    assert po_path.read_text() == po_content
+    assert run('--prune') == ['ru', 'skipped:', 'up', 'to', 'date']
+
+    # when the code changes, the pruned file is compiled again
+    source_path.write_text('from l10n import Locales\nLocales()["ru"].get("unused")\n')
+    assert run('--prune')[:3] == ['ru', 'included:', '1']
+    assert Locale(mo_path).get('unused') == 'неиспользуемый'
+
+    output = run('--prune', '--bundle')
+    assert output[:5] == ['ru', 'included:', '1', 'pruned:', '1']
+    bundle_path = project_root / 'project_test' / 'locales.bundle'
+    assert Locales(path=bundle_path)['ru'].get('hello') == 'hello'
+
+
+def test_compile_prune__imported_constant(
+    project_root: Path, source_path: Path, write_po,
+):
+    # the constant is defined in another top-level package
+    (project_root / 'shared').mkdir()
+    (project_root / 'shared' / '__init__.py').write_text('')
+    (project_root / 'shared' / 'consts.py').write_text(
+        'from typing import Final\nGREETING: Final = "hello"\n',
+    )
+    source_path.write_text(
+        'from l10n import Locales\n'
+        'from shared.consts import GREETING\n'
+        'Locales()["ru"].get(GREETING)\n',
+    )
+    write_po(
+        project_root / 'locales' / 'ru.po',
+        polib.POEntry(msgid='hello', msgstr='привет'),
+        polib.POEntry(msgid='unused', msgstr='неиспользуемый'),
+    )
+
+    stream = StringIO()
+    args = ['--path', str(project_root), '--prune', '--jobs', '2']
+    assert main(['compile', *args], stream=stream) == 0
+    assert stream.getvalue().split()[:5] == ['ru', 'included:', '1', 'pruned:', '1']
+    loc = Locale(project_root / 'project_test' / 'locales' / 'ru.mo')
+    assert loc.get('hello') == 'привет'
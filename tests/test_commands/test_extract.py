@@ -1,3 +1,4 @@
+from io import StringIO
 from pathlib import Path
 from textwrap import dedent
 
@@ -5,6 +6,7 @@ import polib
 import pytest
 
 from l10n._cli import main
+from l10n._extractor import extract_files, extract_messages
 
 
 @pytest.fixture
@@ -94,3 +96,427 @@ def test_update_existing(extract):
     assert enew.msgid == 'world'
     assert eold.msgid == 'hello'
     assert eold.obsolete
+
+
+def test_extract_incremental(project_root: Path, source_path: Path):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    other_path = source_path.parent / 'other.py'
+    other_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("world")
+    """))
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--incremental']
+    assert main(cmd) == 0
+    assert (project_root / '.l10n_cache' / 'messages-mypy.json').exists()
+
+    other_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("oh hi mark")
+    """))
+    assert main(cmd) == 0
+    po_path = project_root / 'locales' / 'ru.po'
+    po_file = polib.pofile(str(po_path))
+    msgids = {e.msgid for e in po_file if not e.obsolete}
+    assert msgids == {'hello', 'oh hi mark'}
+
+
+@pytest.mark.parametrize('args', [[], ['--in-process'], ['--engine', 'ast']])
+def test_extract_incremental__relative_path(
+    project_root: Path, source_path: Path, monkeypatch, args: list,
+):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    monkeypatch.chdir(project_root)
+    cmd = ['extract', '--lang', 'ru', '--incremental', *args]
+    po_path = project_root / 'locales' / 'ru.po'
+
+    def get_occurrences():
+        assert main(cmd) == 0
+        po_file = polib.pofile(str(po_path))
+        return {e.msgid: e.occurrences for e in po_file if not e.obsolete}
+
+    expected = {'hello': [('project_test/core.py', '3')]}
+    # the cold run fills the cache, the warm run takes messages from it
+    assert get_occurrences() == expected
+    assert get_occurrences() == expected
+
+
+@pytest.mark.parametrize('engine', ['mypy', 'ast'])
+def test_extract_incremental__constants(project_root: Path, source_path: Path, engine: str):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        from .consts import MSG
+        Locales()['en'].get(MSG)
+    """))
+    consts_path = source_path.parent / 'consts.py'
+    consts_path.write_text(dedent("""
+        from typing import Final
+        MSG: Final = 'hello'
+    """))
+    po_path = project_root / 'locales' / 'ru.po'
+    cmd = [
+        'extract', '--path', str(project_root), '--lang', 'ru',
+        '--incremental', '--engine', engine,
+    ]
+
+    def get_msgids():
+        assert main(cmd) == 0
+        return {e.msgid for e in polib.pofile(str(po_path)) if not e.obsolete}
+
+    assert get_msgids() == {'hello'}
+    # the file that uses the constant is analyzed again
+    source_path.write_text(source_path.read_text() + '# edited\n')
+    assert get_msgids() == {'hello'}
+    # the file that defines the constant is analyzed again
+    consts_path.write_text(consts_path.read_text().replace('hello', 'world'))
+    assert get_msgids() == {'world'}
+    # nothing has changed
+    assert get_msgids() == {'world'}
+
+
+@pytest.mark.parametrize('relative', [False, True])
+def test_extract_parallel(
+    project_root: Path, source_path: Path, monkeypatch, relative: bool,
+):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+        Locales()['en'].get("world")
+    """))
+    other_path = project_root / 'other_pkg' / 'core.py'
+    other_path.parent.mkdir()
+    (other_path.parent / '__init__.py').write_text('')
+    other_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("oh hi mark")
+    """))
+    (project_root / 'script.py').write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    po_path = project_root / 'locales' / 'ru.po'
+    cmd = [
+        'extract', '--path', str(project_root), '--lang', 'ru',
+        '--now', '2022-01-02T03:04:05+00:00', '--allow-duplicates',
+    ]
+    if relative:
+        # mypy gets `.` for a serial run and `other_pkg` for a shard
+        monkeypatch.chdir(project_root)
+        cmd[1:3] = []
+    assert main(cmd) == 0
+    serial = po_path.read_bytes()
+    if relative:
+        assert b'#: other_pkg/core.py:3' in serial
+    po_path.unlink()
+    assert main(cmd + ['--jobs', '3']) == 0
+    assert po_path.read_bytes() == serial
+
+
+def test_extract_watch(project_root: Path, source_path: Path, monkeypatch):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    other_path = source_path.parent / 'other.py'
+    other_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("world")
+    """))
+    po_path = project_root / 'locales' / 'ru.po'
+
+    def get_msgids():
+        return {e.msgid for e in polib.pofile(str(po_path)) if not e.obsolete}
+
+    def edit():
+        assert get_msgids() == {'hello', 'world'}
+        other_path.write_text(dedent("""
+            from l10n import Locales
+            Locales()['en'].get("oh hi mark")
+        """))
+
+    def stop():
+        raise KeyboardInterrupt
+
+    actions = iter([edit, lambda: None, stop])
+    monkeypatch.setattr('time.sleep', lambda _: next(actions)())
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--watch']
+    assert main(cmd) == 0
+    assert get_msgids() == {'hello', 'oh hi mark'}
+    # the cache is kept between changes without --incremental
+    assert (project_root / '.l10n_cache' / 'messages-mypy.json').exists()
+
+
+def test_extract_watch__constants(project_root: Path, source_path: Path, monkeypatch):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        from .consts import MSG
+        Locales()['en'].get(MSG)
+    """))
+    consts_path = source_path.parent / 'consts.py'
+    consts_path.write_text(dedent("""
+        from typing import Final
+        MSG: Final = 'hello'
+    """))
+    po_path = project_root / 'locales' / 'ru.po'
+
+    def get_msgids():
+        return {e.msgid for e in polib.pofile(str(po_path)) if not e.obsolete}
+
+    def edit_importer():
+        assert get_msgids() == {'hello'}
+        source_path.write_text(source_path.read_text() + '# edited\n')
+
+    def edit_constant():
+        assert get_msgids() == {'hello'}
+        consts_path.write_text(consts_path.read_text().replace('hello', 'world'))
+
+    def stop():
+        raise KeyboardInterrupt
+
+    actions = iter([edit_importer, edit_constant, stop])
+    monkeypatch.setattr('time.sleep', lambda _: next(actions)())
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--watch']
+    assert main(cmd) == 0
+    assert get_msgids() == {'world'}
+
+
+def test_extract_watch__mypy_failed(project_root: Path, source_path: Path, monkeypatch):
+    po_path = project_root / 'locales' / 'ru.po'
+
+    def get_msgids():
+        return {e.msgid for e in polib.pofile(str(po_path)) if not e.obsolete}
+
+    def fix():
+        assert not po_path.exists()
+        source_path.write_text(dedent("""
+            from l10n import Locales
+            Locales()['en'].get("hello")
+        """))
+
+    def stop():
+        raise KeyboardInterrupt
+
+    source_path.write_text('def f(:\n')
+    actions = iter([fix, stop])
+    monkeypatch.setattr('time.sleep', lambda _: next(actions)())
+    stream = StringIO()
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--watch']
+    assert main(cmd, stream=stream) == 0
+    assert 'mypy failed' in stream.getvalue()
+    assert get_msgids() == {'hello'}
+
+
+def test_extract_watch__unexpected_error(
+    project_root: Path, source_path: Path, monkeypatch,
+):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    po_path = project_root / 'locales' / 'ru.po'
+    errors = iter([ValueError('oops')])
+
+    def flaky_extract(*args, **kwargs):
+        for error in errors:
+            raise error
+        return extract_messages(*args, **kwargs)
+
+    def stop():
+        raise KeyboardInterrupt
+
+    def edit():
+        assert not po_path.exists()
+        source_path.write_text(source_path.read_text() + '# edited\n')
+
+    actions = iter([edit, stop])
+    monkeypatch.setattr('l10n._commands._extract.extract_messages', flaky_extract)
+    monkeypatch.setattr('time.sleep', lambda _: next(actions)())
+    stream = StringIO()
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--watch']
+    assert main(cmd, stream=stream) == 0
+    assert 'extraction failed: ValueError: oops' in stream.getvalue()
+    assert po_path.exists()
+
+
+def test_extract_ast_engine(project_root: Path, source_path: Path):
+    source_path.write_text(dedent("""
+        from typing import Final
+        from l10n import Locales
+        msg_id: Final = "oh hi mark"
+        loc = Locales()['en']
+        loc.get(msg_id)
+    """))
+    (source_path.parent / 'other.py').write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello", context="greeting")
+    """))
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--engine', 'ast']
+    assert main(cmd) == 0
+    po_file = polib.pofile(str(project_root / 'locales' / 'ru.po'))
+    assert [e.msgid for e in po_file] == ['oh hi mark', 'hello']
+
+
+def test_extract_ast_engine__imported_constant(project_root: Path, source_path: Path):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        from .consts import MSG
+        Locales()['en'].get(MSG)
+    """))
+    (source_path.parent / 'consts.py').write_text(dedent("""
+        from typing import Final
+        MSG: Final = 'oh hi mark'
+    """))
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru', '--engine', 'ast']
+    assert main(cmd) == 0
+    po_file = polib.pofile(str(project_root / 'locales' / 'ru.po'))
+    assert [e.msgid for e in po_file] == ['oh hi mark']
+
+
+def test_extract_ast_engine__same_as_mypy(
+    project_root: Path, source_path: Path, monkeypatch,
+):
+    # ambiguous: uses a constant imported from another top-level package
+    source_path.write_text(dedent("""
+        from typing import Final
+        from l10n import Locales
+        from shared.consts import GREETING
+        MSG: Final = "oh hi mark"
+        loc = Locales()['en']
+        loc.get(MSG)
+        loc.get(GREETING)
+    """))
+    (project_root / 'shared').mkdir()
+    (project_root / 'shared' / '__init__.py').write_text('')
+    (project_root / 'shared' / 'consts.py').write_text(dedent("""
+        from typing import Final
+        GREETING: Final = "hello"
+    """))
+    (source_path.parent / 'other.py').write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("world")
+    """))
+    analyzed = []
+
+    def spy(paths, **kwargs):
+        analyzed.extend(paths)
+        return extract_files(paths, **kwargs)
+
+    monkeypatch.setattr('l10n._commands._extract.extract_files', spy)
+    monkeypatch.chdir(project_root)
+    po_path = project_root / 'locales' / 'ru.po'
+    cmd = ['extract', '--lang', 'ru', '--now', '2022-01-02T03:04:05+00:00']
+    assert main([*cmd, '--engine', 'mypy']) == 0
+    expected = po_path.read_bytes()
+    po_path.unlink()
+    assert main([*cmd, '--engine', 'ast']) == 0
+    assert po_path.read_bytes() == expected
+    assert b'#: project_test/core.py:7' in expected
+    # mypy analyzes only the ambiguous file, following its imports
+    assert analyzed == [Path('project_test', 'core.py')]
+
+
+def test_merge_duplicates(extract):
+    po_file: polib.POFile = extract("""
+        from l10n import Locales
+        Locales()['en'].get("hello", comment="greeting")
+        Locales()['en'].get("world")
+        Locales()['en'].get("hello")
+    """)
+    assert [e.msgid for e in po_file] == ['hello', 'world']
+    assert [line for _, line in po_file[0].occurrences] == ['3', '5']
+    assert po_file[0].comment == 'greeting'
+
+
+def test_keep_translations(extract, project_root: Path):
+    extract("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+        Locales()['en'].get("world")
+    """)
+    po_path = project_root / 'locales' / 'ru.po'
+    po_file = polib.pofile(str(po_path))
+    po_file[0].msgstr = 'привет'
+    po_file[0].tcomment = 'checked'
+    po_file[1].msgstr = 'мир'
+    po_file[1].flags.append('fuzzy')
+    po_file.save()
+
+    po_file = extract("""
+        from l10n import Locales
+        Locales()['en'].get("world")
+        Locales()['en'].get("hello")
+    """)
+    assert [e.msgid for e in po_file] == ['hello', 'world']
+    hello, world = po_file
+    assert hello.msgstr == 'привет'
+    assert hello.tcomment == 'checked'
+    assert world.msgstr == 'мир'
+    assert world.fuzzy
+    assert [line for _, line in world.occurrences] == ['3']
+
+
+def test_extract_parallel_languages(project_root: Path, source_path: Path):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+        Locales()['en'].get("{n} bird", plural="{n} birds", n=13)
+    """))
+    po_root = project_root / 'locales'
+    po_root.mkdir()
+    langs = ['ru', 'nl', 'uk', 'ar']
+    for lang in langs:
+        (po_root / f'{lang}.po').write_text('')
+    cmd = ['extract', '--path', str(project_root), '--now', '2022-01-02T03:04:05+00:00']
+    assert main(cmd) == 0
+    serial = {lang: (po_root / f'{lang}.po').read_bytes() for lang in langs}
+    for lang in langs:
+        (po_root / f'{lang}.po').write_text('')
+
+    assert main(cmd + ['--jobs', '3']) == 0
+    for lang in langs:
+        assert (po_root / f'{lang}.po').read_bytes() == serial[lang]
+
+
+def test_skip_unchanged(project_root: Path, source_path: Path):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    po_path = project_root / 'locales' / 'ru.po'
+    cmd = ['extract', '--path', str(project_root), '--lang', 'ru']
+    assert main(cmd + ['--now', '2022-01-02T03:04:05+00:00']) == 0
+    content = po_path.read_text()
+    mtime = po_path.stat().st_mtime_ns
+
+    cmd += ['--now', '2023-01-02T03:04:05+00:00']
+    assert main(cmd + ['--check']) == 0
+    assert main(cmd) == 0
+    assert po_path.read_text() == content
+    assert po_path.stat().st_mtime_ns == mtime
+
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("world")
+    """))
+    assert main(cmd + ['--check']) == 1
+    assert po_path.read_text() == content
+    assert main(cmd) == 0
+    po_file = polib.pofile(str(po_path))
+    assert po_file.metadata['PO-Revision-Date'] == '2023-01-02 03:04+0000'
+
+
+def test_check_without_locales(project_root: Path, source_path: Path):
+    source_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    stream = StringIO()
+    cmd = ['extract', '--path', str(project_root), '--check']
+    assert main(cmd, stream=stream) == 1
+    assert 'outdated' in stream.getvalue()
+    assert not (project_root / 'locales').exists()
@@ -0,0 +1,39 @@
+import json
+from io import StringIO
+from pathlib import Path
+
+import polib
+
+from l10n._cli import main
+
+
+def run(project_root: Path, *args: str) -> dict:
+    stream = StringIO()
+    code = main(['stats', '--path', str(project_root), *args], stream=stream)
+    assert code == 0
+    return json.loads(stream.getvalue())
+
+
+def test_stats(project_root: Path, write_po):
+    write_po(
+        project_root / 'locales' / 'ru.po',
+        polib.POEntry(msgid='hello', msgstr='привет'),
+        polib.POEntry(msgid='world', msgstr='мир', flags=['fuzzy']),
+        polib.POEntry(msgid='bye'),
+        polib.POEntry(msgid='old', msgstr='старый', obsolete=True),
+    )
+
+    stream = StringIO()
+    code = main(['stats', '--path', str(project_root), '--runtime'], stream=stream)
+    assert code == 1
+    assert 'l10n compile' in stream.getvalue()
+
+    for args in ([], ['--bundle']):
+        assert main(['compile', '--path', str(project_root), *args]) == 0
+        result = run(project_root, '--runtime')
+        usage = result['languages']['ru']['messages']
+        assert usage['loaded'] is True
+        # the header, and the translated and fuzzy messages
+        assert usage['entries'] == 3
+        assert usage['total_bytes'] == usage['string_bytes'] + usage['container_bytes']
+        assert result['total_bytes'] == usage['total_bytes']
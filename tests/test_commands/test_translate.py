@@ -1,3 +1,4 @@
+from io import StringIO
 from pathlib import Path
 
 import polib
@@ -7,14 +8,9 @@ from l10n._cli import main
 
 
 @pytest.fixture
-def translate(project_root: Path):
+def translate(project_root: Path, write_po):
     def f(*entries):
-        po_file = polib.POFile(encoding='UTF-8')
-        po_file.metadata['Content-Type'] = 'text/plain; charset=UTF-8'
-        po_file.extend(entries)
-        po_path = project_root / 'locales' / 'ru.po'
-        po_path.parent.mkdir(exist_ok=True)
-        po_file.save(str(po_path))
+        po_path = write_po(project_root / 'locales' / 'ru.po', *entries)
         code = main(['translate', '--path', str(project_root)])
         assert code == 0
         return polib.pofile(str(po_path))
@@ -29,3 +25,111 @@ def test_translate_simple(translate):
     assert e.msgid == 'Hello world'
     assert e.flags == ['fuzzy']
     assert e.msgstr == 'Привет, мир'
+
+
+def test_translate_backend(project_root: Path, write_po):
+    po_root = project_root / 'locales'
+    for lang in ('pt_BR', 'pt_PT', 'ru'):
+        write_po(
+            po_root / f'{lang}.po',
+            polib.POEntry(msgid='hello'),
+            polib.POEntry(msgid='world', msgstr='existing'),
+            language=lang,
+        )
+
+    stream = StringIO()
+    args = ['--path', str(project_root), '--backend', 'tests.test_backends:FakeBackend']
+    code = main(['translate', *args], stream=stream)
+    assert code == 0
+    assert stream.getvalue().split() == [
+        'pt_BR', 'translated:', '1', 'skipped:', '1', 'failed:', '0',
+        'pt_PT', 'translated:', '1', 'skipped:', '1', 'failed:', '0',
+        'ru', 'translated:', '1', 'skipped:', '1', 'failed:', '0',
+    ]
+    po_file = polib.pofile(str(po_root / 'pt_PT.po'))
+    assert po_file[0].msgstr == 'pt: hello'
+    assert po_file[0].flags == ['fuzzy']
+    assert po_file[1].msgstr == 'existing'
+    assert polib.pofile(str(po_root / 'ru.po'))[0].msgstr == 'ru: hello'
+
+
+def test_translate_memory(project_root: Path, write_po):
+    po_path = project_root / 'locales' / 'ru.po'
+
+    def run(*msgids: str, args=()) -> str:
+        write_po(po_path, *(polib.POEntry(msgid=msgid) for msgid in msgids))
+        stream = StringIO()
+        backend = 'tests.test_backends:FakeBackend'
+        argv = ['translate', '--path', str(project_root), '--backend', backend, *args]
+        assert main(argv, stream=stream) == 0
+        return stream.getvalue()
+
+    def summary(translated: int, remembered: int) -> list[str]:
+        result = ['ru', 'translated:', str(translated)]
+        if remembered:
+            result += ['from', 'memory:', str(remembered)]
+        return result + ['skipped:', '0', 'failed:', '0']
+
+    assert run('hello', 'open file').split() == summary(2, 0)
+    assert (project_root / '.l10n_cache' / 'translations.sqlite3').exists()
+    assert run('hello', 'Open file!', 'new').split() == summary(3, 1)
+    assert run('hello', 'Hello!', args=['--similar']).split() == summary(2, 2)
+    entry = polib.pofile(str(po_path))[1]
+    assert entry.msgstr == 'ru: hello'
+    assert entry.previous_msgid == 'hello'
+    assert entry.flags == ['fuzzy']
+    assert run('hello', args=['--no-memory']).split() == summary(1, 0)
+
+
+def test_translate_resume(project_root: Path, write_po):
+    po_path = project_root / 'locales' / 'ru.po'
+    write_po(po_path, *(polib.POEntry(msgid=msgid) for msgid in 'abcde'))
+
+    def run(backend: str) -> tuple[int, list[str]]:
+        stream = StringIO()
+        code = main([
+            'translate', '--path', str(project_root),
+            '--backend', f'tests.test_backends:{backend}',
+            '--concurrency', '1', '--retries', '0',
+            '--checkpoint-every', '1', '--no-memory',
+        ], stream=stream)
+        return code, stream.getvalue().split()
+
+    code, output = run('InterruptedBackend')
+    assert code == 1
+    assert output[:7] == ['ru', 'translated:', '2', 'skipped:', '0', 'failed:', '0']
+    assert output[7] == 'interrupted,'
+    assert [e.msgstr for e in polib.pofile(str(po_path))] == ['ru: a', 'ru: b', '', '', '']
+    assert list(po_path.parent.iterdir()) == [po_path]
+
+    code, output = run('BrokenBackend')
+    assert code == 1
+    assert output == [
+        'failed', 'to', 'translate', '3', 'messages', 'into', 'ru:',
+        'ConnectionError:', 'service', 'unavailable',
+        'ru', 'translated:', '0', 'skipped:', '2', 'failed:', '3',
+    ]
+
+    code, output = run('FakeBackend')
+    assert code == 0
+    assert output == ['ru', 'translated:', '3', 'skipped:', '2', 'failed:', '0']
+    assert [e.msgstr for e in polib.pofile(str(po_path))] == [f'ru: {m}' for m in 'abcde']
+
+
+def test_translate_workspace(tmp_path: Path, write_po):
+    for name in ('alpha', 'beta'):
+        root = tmp_path / name
+        write_po(root / 'locales' / 'ru.po', polib.POEntry(msgid='hello'))
+        (root / 'pyproject.toml').write_text('')
+    (tmp_path / 'pyproject.toml').write_text('')
+
+    stream = StringIO()
+    args = ['--path', str(tmp_path), '--backend', 'tests.test_backends:FakeBackend']
+    code = main(['translate', '--workspace', *args], stream=stream)
+    assert code == 0
+    assert stream.getvalue().split() == [
+        'alpha:', 'ru', 'translated:', '1', 'skipped:', '0', 'failed:', '0',
+        'beta:', 'ru', 'translated:', '1', 'skipped:', '0', 'failed:', '0',
+    ]
+    po_file = polib.pofile(str(tmp_path / 'beta' / 'locales' / 'ru.po'))
+    assert po_file[0].msgstr == 'ru: hello'
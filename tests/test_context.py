@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+import l10n
+from l10n import Locale
+from l10n._mo import compile_po
+
+
+PO = '''
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+
+msgid "hello"
+msgstr "{hello}"
+
+msgctxt "ctx"
+msgid "hello"
+msgstr "{hello} (ctx)"
+'''
+
+
+@pytest.fixture
+def make_locale(tmp_path: Path):
+    def make(lang: str, hello: str) -> Locale:
+        po_path = tmp_path / f'{lang}.po'
+        po_path.write_text(PO.format(hello=hello), encoding='utf8')
+        mo_path = tmp_path / f'{lang}.mo'
+        compile_po(po_path, mo_path)
+        return Locale(mo_path, language=lang)
+    return make
+
+
+def test_activate(make_locale):
+    ru = make_locale('ru', 'привет')
+    nl = make_locale('nl', 'hallo')
+    assert l10n.active_locale() is None
+    assert l10n.get('hello') == 'hello'
+    assert l10n.get('hello', plural='hellos', n=2) == 'hellos'
+    with l10n.activate(ru) as loc:
+        assert loc is ru
+        assert l10n.active_locale() is ru
+        assert l10n.get('hello') == 'привет'
+        assert l10n.get('hello', context='ctx') == 'привет (ctx)'
+        with l10n.activate(nl):
+            assert l10n.get('hello') == 'hallo'
+            with l10n.activate(None):
+                assert l10n.get('hello') == 'hello'
+        assert l10n.get('hello') == 'привет'
+    assert l10n.active_locale() is None
+
+
+def test_activate__deactivated_on_error(make_locale):
+    ru = make_locale('ru', 'привет')
+    with pytest.raises(ZeroDivisionError):
+        with l10n.activate(ru):
+            1 / 0
+    assert l10n.active_locale() is None
+
+
+def test_activate__asyncio_tasks(make_locale):
+    locales = [make_locale('ru', 'привет'), make_locale('nl', 'hallo')]
+
+    async def handle(loc: Locale) -> list:
+        with l10n.activate(loc):
+            result = [l10n.get('hello')]
+            # let the other task run in the middle
+            await asyncio.sleep(0)
+            result.append(l10n.get('hello'))
+            # tasks started inside inherit the active locale
+            result.append(await asyncio.create_task(greet()))
+            return result
+
+    async def greet() -> str:
+        return l10n.get('hello')
+
+    async def main():
+        return await asyncio.gather(*[handle(loc) for loc in locales])
+
+    assert asyncio.run(main()) == [['привет'] * 3, ['hallo'] * 3]
+
+
+def test_activate__threads(make_locale):
+    ru = make_locale('ru', 'привет')
+    with l10n.activate(ru):
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # a new thread starts with an empty context
+            assert executor.submit(l10n.get, 'hello').result() == 'hello'
@@ -1,6 +1,10 @@
 from pathlib import Path
+from textwrap import dedent
 
-from l10n._extractor import extract_messages
+import pytest
+
+from l10n._ast_extractor import extract_messages_ast
+from l10n._extractor import extract_files, extract_messages, get_shards
 
 
 ROOT = Path(__file__).parent.parent
@@ -12,3 +16,199 @@ def test_extract_messages__example():
     assert [m.text for m in messages] == [
         'Hello, {user_name}!',
     ]
+
+
+def test_extract_messages_ast__same_as_mypy(tmp_path: Path):
+    path = tmp_path / 'example.py'
+    path.write_text(dedent("""
+        import l10n
+        from l10n import Locales, Locale as L
+
+        locales = Locales()
+        loc = locales['en']
+        Locales()['en'].get("hello")
+        loc.get('x', context='ctx', comment='c', plural='xs', n=3)
+        loc.get(
+            'multi'
+            ' line',
+            n=len([]),
+        )
+
+        def f(lc: L, other: 'l10n.Locale'):
+            lc.get('annotated')
+            other.get(message='kw')
+            return [lc.get('nested {x}').format(x=1) for _ in range(2)]
+
+        class C:
+            def __init__(self):
+                self.loc = locales.get_cached('ru')
+
+            def g(self):
+                if self.loc:
+                    return self.loc.get('attr')
+    """))
+    expected = sorted(extract_files([path]))
+    assert len(expected) == 7
+    result = extract_messages_ast([path])
+    assert result.ambiguous == []
+    assert sorted(result.messages) == expected
+
+
+def test_extract_messages_ast__ambiguous(tmp_path: Path):
+    literal_path = tmp_path / 'literal.py'
+    literal_path.write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get("hello")
+    """))
+    const_path = tmp_path / 'const.py'
+    const_path.write_text(dedent("""
+        from typing import Final
+        from l10n import Locales
+        msg_id: Final = "oh hi mark"
+        Locales()['en'].get(msg_id)
+    """))
+    result = extract_messages_ast([literal_path, const_path], jobs=2)
+    assert [m.text for m in result.messages] == ['hello']
+    assert result.ambiguous == [const_path]
+
+
+def test_extract_messages_ast__names(tmp_path: Path):
+    path = tmp_path / 'example.py'
+    path.write_text('request.locale.get("hello")')
+    result = extract_messages_ast([path])
+    assert result.messages == []
+    result = extract_messages_ast([path], names={'locale'})
+    assert [m.text for m in result.messages] == ['hello']
+
+
+def test_extract_messages_ast__scopes(tmp_path: Path):
+    path = tmp_path / 'example.py'
+    path.write_text(dedent("""
+        from l10n import Locales
+
+        def early():
+            return loc.get('assigned later')
+
+        loc = Locales()['en']
+
+        def shadowed(loc):
+            return loc.get('shadowed')
+
+        class A:
+            def __init__(self):
+                self.loc = Locales()['en']
+
+            def f(self):
+                return self.loc.get('self attribute')
+
+        class B:
+            def __init__(self):
+                self.loc = {}
+
+            def f(self):
+                return self.loc.get('dict')
+    """))
+    expected = sorted(extract_files([path]))
+    assert [m.text for m in expected] == ['assigned later', 'self attribute']
+    result = extract_messages_ast([path])
+    assert result.ambiguous == []
+    assert sorted(result.messages) == expected
+
+
+def test_extract_messages_ast__ambiguous_names(tmp_path: Path):
+    reassigned_path = tmp_path / 'reassigned.py'
+    reassigned_path.write_text(dedent("""
+        from l10n import Locales
+        loc = Locales()['en']
+        loc = {}
+        loc.get('hello')
+    """))
+    attribute_path = tmp_path / 'attribute.py'
+    attribute_path.write_text(dedent("""
+        from l10n import Locales
+        class A:
+            def __init__(self):
+                self.loc = Locales()['en']
+        def f(other):
+            return other.loc.get('hello')
+    """))
+    result = extract_messages_ast([reassigned_path, attribute_path])
+    assert result.messages == []
+    assert result.ambiguous == [reassigned_path, attribute_path]
+
+
+def test_extract_messages__in_process():
+    path = ROOT / 'example-project'
+    messages = list(extract_messages(path, in_process=True))
+    assert messages == list(extract_messages(path))
+
+
+def test_extract_messages_ast__get_function(tmp_path: Path):
+    path = tmp_path / 'example.py'
+    path.write_text(dedent("""
+        import l10n
+        from l10n import get as _
+
+        l10n.get('module', context='ctx')
+        _('function', plural='functions', n=2)
+        l10n.Locales().get('en')
+    """))
+    expected = sorted(extract_files([path]))
+    assert [m.text for m in expected] == ['function', 'module']
+    result = extract_messages_ast([path])
+    assert result.ambiguous == []
+    assert sorted(result.messages) == expected
+
+
+def test_extract_messages__shards_import_each_other(tmp_path: Path):
+    for name in ('pkg', 'other', 'unrelated'):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / '__init__.py').write_text('')
+    (tmp_path / 'pkg' / 'consts.py').write_text(dedent("""
+        from typing import Final
+        MSG: Final = 'from constant'
+    """))
+    (tmp_path / 'pkg' / 'core.py').write_text(dedent("""
+        from l10n import Locales
+        from .consts import MSG
+        Locales()['en'].get(MSG)
+    """))
+    (tmp_path / 'other' / 'mod.py').write_text(dedent("""
+        from l10n import Locales
+        from pkg.consts import MSG
+        Locales()['en'].get(MSG)
+    """))
+    (tmp_path / 'unrelated' / 'mod.py').write_text(dedent("""
+        from l10n import Locales
+        Locales()['en'].get('literal')
+    """))
+    shards = get_shards(tmp_path)
+    assert shards == [[tmp_path / 'other', tmp_path / 'pkg'], [tmp_path / 'unrelated']]
+    expected = sorted(m.text for m in extract_messages(tmp_path))
+    assert expected == ['from constant', 'from constant', 'literal']
+    assert sorted(m.text for m in extract_messages(tmp_path, jobs=2)) == expected
+
+
+@pytest.mark.parametrize('in_process', [False, True])
+def test_extract_messages__mypy_failed(tmp_path: Path, in_process: bool):
+    (tmp_path / 'example.py').write_text('def f(:\n')
+    with pytest.raises(RuntimeError, match='syntax'):
+        list(extract_messages(tmp_path, in_process=in_process))
+
+
+def test_extract_messages__nothing_to_analyze(tmp_path: Path):
+    assert list(extract_messages(tmp_path)) == []
+
+
+@pytest.mark.skipif(not Path('/proc/self/fd').exists(), reason='needs procfs')
+def test_extract_messages__popen_failed(tmp_path: Path, monkeypatch):
+    (tmp_path / 'example.py').write_text('')
+
+    def popen(*args, **kwargs):
+        raise OSError('oh no')
+
+    monkeypatch.setattr('subprocess.Popen', popen)
+    fds_before = len(list(Path('/proc/self/fd').iterdir()))
+    with pytest.raises(OSError):
+        list(extract_messages(tmp_path))
+    assert len(list(Path('/proc/self/fd').iterdir())) == fds_before
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+
+# Modules that must not be imported by `import l10n`,
+# they are imported only by the features that need them.
+LAZY_MODULES = (
+    'datetime', 'decimal', 'gettext', 'inspect', 'json', 'locale', 'threading',
+    'numpy', 'mypy', 'polib',
+)
+# Max time in microseconds that `import l10n` may take, including
+# the standard library modules it needs. Very generous to not be flaky on CI,
+# it's there to catch importing something heavy at the module level.
+IMPORT_BUDGET = 150_000
+
+
+def run_python(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def test_lazy_imports():
+    code = 'import sys; import l10n; print(" ".join(sys.modules))'
+    modules = set(run_python(code).stdout.split())
+    assert 'l10n' in modules
+    assert modules.isdisjoint(LAZY_MODULES)
+
+
+def test_import_time():
+    # the first run may write bytecode cache
+    run_python('import l10n')
+    stderr = run_python('import l10n').stderr
+    for line in stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line.split('|')
+        if name.strip() == 'l10n':
+            assert int(cumulative) < IMPORT_BUDGET
+            return
+    raise AssertionError('l10n import time is not reported')
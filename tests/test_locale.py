@@ -1,12 +1,29 @@
+import gc
+import sys
 from datetime import date, time
 from pathlib import Path
 
 import pytest
 
-from l10n._locale import Locale
+from l10n import Locales
+from l10n._locale import Locale, MemoryUsage, catalogs
+from l10n._mo import compile_po
+from l10n._plurals import PLURALS
 
 
 SPHINX_MO = Path('/usr/share/locale/ru/LC_MESSAGES/sphinx.mo')
+PLURAL_PO = '''
+msgid ""
+msgstr ""
+"Content-Type: text/plain; charset=UTF-8\\n"
+"Plural-Forms: nplurals=3; plural={expr};\\n"
+
+msgid "{{n}} file"
+msgid_plural "{{n}} files"
+msgstr[0] "{{n}} файл"
+msgstr[1] "{{n}} файла"
+msgstr[2] "{{n}} файлов"
+'''
 
 
 @pytest.mark.skipif(not SPHINX_MO.exists(), reason='no mo file for Sphinx')
@@ -17,6 +34,97 @@ def test_read_mo():
     assert loc.get(msgid) == 'Не могу загрузить модуль расширения %s'
 
 
+@pytest.fixture
+def plural_locale(tmp_path: Path) -> Locale:
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(PLURAL_PO.format(expr=PLURALS['ru'].expr), encoding='utf8')
+    mo_path = tmp_path / 'ru.mo'
+    compile_po(po_path, mo_path)
+    return Locale(mo_path, language='ru')
+
+
+@pytest.mark.parametrize('with_numpy', [True, False])
+def test_get_plural(plural_locale: Locale, with_numpy: bool, monkeypatch):
+    if with_numpy:
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setitem(sys.modules, 'numpy', None)
+    counts = [1, 2, 5, 21, 22, 111]
+    assert plural_locale.plural_index_many(counts) == [0, 1, 2, 0, 1, 2]
+    translations = plural_locale.get_plural('{n} file', '{n} files', counts)
+    assert translations == [
+        plural_locale.get('{n} file', plural='{n} files', n=n) for n in counts
+    ]
+    assert translations == [
+        '{n} файл', '{n} файла', '{n} файлов', '{n} файл', '{n} файла', '{n} файлов',
+    ]
+    assert plural_locale.get_plural('unknown', 'unknowns', [1, 2]) == ['unknown', 'unknowns']
+    assert plural_locale.get_plural('{n} file', '{n} files', [2], context='ctx') == ['{n} files']
+
+
+def test_plural_index_many__numpy_array(plural_locale: Locale):
+    numpy = pytest.importorskip('numpy')
+    counts = numpy.arange(1000)
+    indices = plural_locale.plural_index_many(counts)
+    assert isinstance(indices, numpy.ndarray)
+    assert indices.tolist() == [plural_locale._plural_id(n) for n in range(1000)]
+    translations = plural_locale.get_plural('{n} file', '{n} files', counts)
+    assert translations[21] == '{n} файл'
+
+
+def test_shared_catalog(plural_locale: Locale):
+    assert plural_locale.path is not None
+    path = plural_locale.path
+    other = Locales(path=path.parent)['ru_RU']
+    assert other is not plural_locale
+    assert other._messages is plural_locale._messages
+    assert len({plural_locale, other, Locale(path)}) == 1
+    assert plural_locale in {Locale(path, language='ru')}
+    assert hash(Locale(language='ru')) == hash(Locale(language='ru'))
+    # equal locales have equal hashes, whatever side is compared
+    assert Locale(language='ru') != Locale(path, language='ru')
+    assert Locale(path, language='ru') != Locale(language='ru')
+    assert len({Locale(language='ru'), Locale(path, language='ru')}) == 2
+
+    key = plural_locale._catalog_key()
+    assert key in catalogs
+    plural_locale.reset_cache()
+    del other
+    gc.collect()
+    assert key not in catalogs
+
+    # the file has changed, so it's loaded again
+    old = Locale(path)
+    old._messages
+    po_path = path.with_suffix('.po')
+    po_path.write_text(po_path.read_text('utf8').replace('файлов', 'файликов'), 'utf8')
+    compile_po(po_path, path)
+    new = Locale(path)
+    assert new.get('{n} file', n=5) == '{n} файликов'
+    assert old.get('{n} file', n=5) == '{n} файлов'
+
+
+def test_memory_usage(plural_locale: Locale):
+    usage = plural_locale.memory_usage()
+    assert usage == {'messages': MemoryUsage(loaded=False)}
+
+    plural_locale.get('{n} file')
+    usage = plural_locale.memory_usage()
+    assert list(usage) == ['messages']
+    messages = usage['messages']
+    assert messages.loaded
+    # the header and 3 plural forms
+    assert messages.entries == 4
+    assert messages.string_bytes > len('{n} файлов'.encode())
+    assert messages.container_bytes > 0
+    assert messages.total_bytes == messages.string_bytes + messages.container_bytes
+    assert messages.load_time > 0
+
+    # another locale for the same file shares the loaded catalog
+    assert plural_locale.path is not None
+    assert Locale(plural_locale.path).memory_usage() == usage
+
+
 @pytest.mark.parametrize('language, expected', [
     ('ru', '31.12.2021'),
     ('ru_RU', '31.12.2021'),
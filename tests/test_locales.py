@@ -1,9 +1,13 @@
+import inspect
 import os
 from pathlib import Path
+from textwrap import dedent
 
 import pytest
 
 from l10n import Locales
+from l10n._locales import _get_catalog_path
+from l10n._mo import compile_po
 
 
 def test_system_language():
@@ -27,3 +31,49 @@ def test_get_locale(tmp_path: Path):
     assert locales.get('en') is None
     with pytest.raises(KeyError):
         locales['en']
+
+
+def test_find_catalog(tmp_path: Path, monkeypatch):
+    monkeypatch.delattr(inspect, 'stack')
+    path = tmp_path / 'app' / 'views.py'
+    path.parent.mkdir()
+    source = dedent("""
+        from l10n import Locales
+
+        def view(depth):
+            if depth:
+                return view(depth - 1)
+            return Locales().path
+    """)
+    namespace: dict = {}
+    exec(compile(source, str(path), 'exec'), namespace)
+    # the catalog is looked up relative to the module that created Locales
+    assert namespace['view'](200) == tmp_path / 'app' / 'locales'
+    hits = _get_catalog_path.cache_info().hits
+    assert namespace['view'](0) == tmp_path / 'app' / 'locales'
+    assert _get_catalog_path.cache_info().hits == hits + 1
+    # it's the same when called from this file
+    assert Locales().path == Path(__file__).parent / 'locales'
+
+
+def test_stats(tmp_path: Path):
+    (tmp_path / 'locales').mkdir()
+    for lang in ('ru', 'nl'):
+        po_path = tmp_path / f'{lang}.po'
+        po_path.write_text(f'msgid "hello"\nmsgstr "hello in {lang}"\n', encoding='utf8')
+        compile_po(po_path, tmp_path / 'locales' / f'{lang}.mo')
+    locales = Locales(path=tmp_path / 'locales')
+    stats = locales.stats()
+    assert list(stats) == ['nl', 'ru']
+    assert not stats['ru']['messages'].loaded
+
+    ru = locales['ru']
+    ru.get('hello')
+    stats = locales.stats()
+    assert not stats['nl']['messages'].loaded
+    assert stats['ru']['messages'].loaded
+    # the header and the message
+    assert stats['ru']['messages'].entries == 2
+
+    stats = locales.stats(load=True)
+    assert stats['nl']['messages'].loaded
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from l10n._memory import Match, TranslationMemory, get_skeleton, normalize
+
+
+def test_translation_memory(tmp_path: Path):
+    path = tmp_path / 'sub' / 'memory.sqlite3'
+    with TranslationMemory(path) as memory:
+        assert memory.get('Hello', src='en', dest='ru') is None
+        memory.add([('Hello', 'Привет'), ('Open file', 'Открыть файл')], src='en', dest='ru')
+        memory.add([('Hello', 'Hallo')], src='en', dest='nl')
+
+    with TranslationMemory(path) as memory:
+        assert memory.get('Hello', src='en', dest='ru') == 'Привет'
+        assert memory.get(' Hello\n', src='en', dest='ru') == 'Привет'
+        assert memory.get('Hello', src='en', dest='nl') == 'Hallo'
+        assert memory.get('Hello', src='de', dest='nl') is None
+        assert memory.get('hello', src='en', dest='ru') is None
+
+        match = memory.find_similar('open file...', src='en', dest='ru')
+        assert match == Match('Open file', 'Открыть файл')
+        assert memory.find_similar('Open files', src='en', dest='ru') is None
+        assert memory.find_similar('...', src='en', dest='ru') is None
+
+        memory.add([('You have 3 items', 'У вас 3 предмета')], src='en', dest='ru')
+        assert memory.find_similar('You have 5 items', src='en', dest='ru') is None
+        memory.add([('Hello, {name}!', 'Привет, {name}!')], src='en', dest='ru')
+        assert memory.find_similar('hello {user}', src='en', dest='ru') is None
+        match = memory.find_similar('hello {name}', src='en', dest='ru')
+        assert match == Match('Hello, {name}!', 'Привет, {name}!')
+
+        memory.add([('Hello', 'Здравствуй')], src='en', dest='ru')
+        assert memory.get('Hello', src='en', dest='ru') == 'Здравствуй'
+
+
+def test_normalize():
+    assert normalize('  Hello,\n\tworld ') == 'Hello, world'
+    assert get_skeleton('Hello, {name}!') == 'hello {name}'
+    assert get_skeleton('hello  {name}') == 'hello {name}'
+    assert get_skeleton('Hello, {Name}!') == 'hello {Name}'
+    assert get_skeleton('hello name') == 'hello name'
+    assert get_skeleton('Page 2 of 3') == 'page 2 of 3'
+
+
+def test_find_similar__old_skeleton(tmp_path: Path):
+    with TranslationMemory(tmp_path / 'memory.sqlite3') as memory:
+        # stored by a version that dropped numbers from skeletons
+        memory._db.execute(
+            'INSERT INTO translations VALUES (?, ?, ?, ?, ?, ?)',
+            ('en', 'ru', 'Page 2', 'page', 'Page 2', 'Страница 2'),
+        )
+        assert memory.find_similar('page', src='en', dest='ru') is None
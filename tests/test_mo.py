@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import gettext
+import struct
+from pathlib import Path
+
+import polib
+import pytest
+
+from l10n._mo import (
+    build_mo, compile_po, detect_encoding, get_mo_size, hash_key, next_prime,
+    read_po,
+)
+
+
+PO = r'''
+# translator comment
+msgid ""
+msgstr ""
+"Project-Id-Version: test 1.0\n"
+"Language: ru\n"
+"Content-Type: text/plain; charset={charset}\n"
+"Plural-Forms: nplurals=3; "
+"plural=(n%10==1 && n%100!=11 ? 0 : "
+"n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);\n"
+
+#: core.py:12
+msgid "hello"
+msgstr "привет"
+
+#, python-brace-format
+msgid "hello {name}"
+msgstr ""
+"привет "
+"{name}"
+
+msgctxt "a verb"
+msgid "open"
+msgstr "открыть"
+
+#, fuzzy
+msgid "fuzzy"
+msgstr "пушистый"
+
+msgid "untranslated"
+msgstr ""
+
+msgid "{n} bird"
+msgid_plural "{n} birds"
+msgstr[0] "{n} птица"
+msgstr[1] "{n} птицы"
+msgstr[2] "{n} птиц"
+
+msgid "{n} cat"
+msgid_plural "{n} cats"
+msgstr[0] "{n} кошка"
+msgstr[1] ""
+msgstr[2] ""
+
+msgid "escapes \"quoted\"\ttab\\"
+msgstr "экранирование \"кавычки\"\tтаб\\\n"
+
+#, fuzzy
+#~ msgid "obsolete"
+#~ msgstr "устаревший"
+
+msgid "after obsolete"
+msgstr "после устаревшего"
+'''
+
+HEADER = 'msgid ""\nmsgstr "Content-Type: text/plain; charset=UTF-8\\n"\n\n'
+
+
+def compile_polib(po_path: Path, mo_path: Path, fuzzy: bool) -> None:
+    po_file = polib.pofile(str(po_path))
+    if fuzzy:
+        for entry in po_file:
+            if entry.fuzzy:
+                entry.flags.remove('fuzzy')
+    po_file.save_as_mofile(str(mo_path))
+
+
+def read_mo(path: Path) -> gettext.GNUTranslations:
+    with path.open('rb') as stream:
+        return gettext.GNUTranslations(stream)
+
+
+def unpack_mo(content: bytes) -> dict[bytes, bytes]:
+    """Read all keys and values from the tables, like msgunfmt does.
+    """
+    _, _, count, keys_start, values_start, _, _ = struct.unpack_from('<7I', content)
+    result = {}
+    for i in range(count):
+        key_len, key_offset = struct.unpack_from('<2I', content, keys_start + i * 8)
+        value_len, value_offset = struct.unpack_from('<2I', content, values_start + i * 8)
+        key = content[key_offset:key_offset + key_len]
+        result[key] = content[value_offset:value_offset + value_len]
+    return result
+
+
+def lookup_mo(content: bytes, key: bytes) -> bytes | None:
+    """Find the value using only the hash table, like GNU gettext does.
+    """
+    _, _, _, keys_start, values_start, size, table_start = struct.unpack_from(
+        '<7I', content,
+    )
+    assert size >= 3
+    hval = hash_key(key)
+    slot = hval % size
+    incr = 1 + hval % (size - 2)
+    while True:
+        (index,) = struct.unpack_from('<I', content, table_start + slot * 4)
+        if index == 0:
+            return None
+        index -= 1
+        key_len, key_offset = struct.unpack_from('<2I', content, keys_start + index * 8)
+        if content[key_offset:key_offset + key_len].split(b'\x00')[0] == key:
+            value_len, value_offset = struct.unpack_from(
+                '<2I', content, values_start + index * 8,
+            )
+            return content[value_offset:value_offset + value_len]
+        slot = (slot + incr) % size
+
+
+@pytest.mark.parametrize('fuzzy', [True, False])
+@pytest.mark.parametrize('charset', ['UTF-8', 'cp1251'])
+def test_compile_po__same_as_polib(tmp_path: Path, fuzzy: bool, charset: str):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(PO.replace('{charset}', charset), encoding=charset)
+    expected_path = tmp_path / 'expected.mo'
+    compile_polib(po_path, expected_path, fuzzy=fuzzy)
+    actual_path = tmp_path / 'actual.mo'
+    translated = compile_po(po_path, actual_path, fuzzy=fuzzy)
+    assert translated == (7 if fuzzy else 6)
+
+    expected = read_mo(expected_path)
+    actual = read_mo(actual_path)
+    assert actual._catalog == expected._catalog  # type: ignore[attr-defined]
+    assert actual._info == expected._info  # type: ignore[attr-defined]
+    assert actual._catalog['after obsolete'] == 'после устаревшего'  # type: ignore
+    assert actual.pgettext('a verb', 'open') == 'открыть'
+    assert actual.ngettext('{n} bird', '{n} birds', 21) == '{n} птица'
+    assert actual.ngettext('{n} bird', '{n} birds', 3) == '{n} птицы'
+
+
+def test_compile_po__empty_context(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(HEADER + 'msgctxt ""\nmsgid "hello"\nmsgstr "привет"\n')
+    mo_path = tmp_path / 'ru.mo'
+    assert compile_po(po_path, mo_path) == 1
+    assert read_mo(mo_path).pgettext('', 'hello') == 'привет'
+
+
+def test_compile_po__escapes_same_as_polib(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(HEADER + r'''
+msgid "a\vb\bc\fd\re"
+msgstr "\t\v\b\f\r\\\""
+''')
+    expected_path = tmp_path / 'expected.mo'
+    compile_polib(po_path, expected_path, fuzzy=False)
+    actual_path = tmp_path / 'actual.mo'
+    assert compile_po(po_path, actual_path) == 1
+    actual = read_mo(actual_path)
+    assert actual._catalog == read_mo(expected_path)._catalog  # type: ignore[attr-defined]
+    assert actual.gettext('a\vb\bc\fd\re') == '\t\v\b\f\r\\"'
+
+
+def test_compile_po__c_escapes(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(HEADER + r'''
+msgid "bell"
+msgstr "\a \' \? \101\x42 \0"
+''')
+    mo_path = tmp_path / 'ru.mo'
+    assert compile_po(po_path, mo_path) == 1
+    assert read_mo(mo_path).gettext('bell') == '\a \' ? AB \0'
+
+
+def test_compile_po__non_ascii_escapes(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    # bytes of one character may be split between lines
+    po_path.write_text(HEADER + r'''
+msgid "cafe"
+msgstr "caf\303\251 \xd0\xbc\320"
+"\xb8\321\200"
+''')
+    mo_path = tmp_path / 'ru.mo'
+    assert compile_po(po_path, mo_path) == 1
+    assert read_mo(mo_path).gettext('cafe') == 'café мир'
+
+    # escapes are bytes in the charset of the file
+    po_path.write_bytes(HEADER.replace('UTF-8', 'CP1251').encode() + rb'''
+msgid "world"
+msgstr "\354\xe8\360"
+''')
+    assert compile_po(po_path, mo_path) == 1
+    assert read_mo(mo_path).gettext('world') == 'мир'
+
+
+def test_compile_po__duplicates(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(HEADER + 'msgid "hello"\nmsgstr "привет"\n\nmsgid "hello"\nmsgstr "здравствуй"\n')
+    mo_path = tmp_path / 'ru.mo'
+    assert compile_po(po_path, mo_path) == 1
+    assert read_mo(mo_path).gettext('hello') == 'здравствуй'
+
+
+def test_compile_po__empty(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text('msgid "hello"\nmsgstr ""\n')
+    mo_path = tmp_path / 'ru.mo'
+    assert compile_po(po_path, mo_path) is None
+    assert not mo_path.exists()
+    assert compile_po(po_path, mo_path, allow_empty=True) == 0
+    assert read_mo(mo_path)._catalog == {'': ''}  # type: ignore[attr-defined]
+
+
+def test_detect_encoding(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=CHARSET\\n"\n')
+    assert detect_encoding(po_path) == 'utf-8'
+    po_path.write_text('msgid ""\nmsgstr ""\n"Content-Type: text/plain; charset=latin-1\\n"\n')
+    assert detect_encoding(po_path) == 'latin-1'
+
+
+def test_compile_po__hash_table(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(PO.replace('{charset}', 'UTF-8'), encoding='utf8')
+    plain_path = tmp_path / 'plain.mo'
+    compile_po(po_path, plain_path)
+    hashed_path = tmp_path / 'hashed.mo'
+    compile_po(po_path, hashed_path, hash_table=True)
+
+    plain = plain_path.read_bytes()
+    hashed = hashed_path.read_bytes()
+    pairs = unpack_mo(hashed)
+    assert pairs == unpack_mo(plain)
+    # 8 messages: the smallest prime >= 8 * 4 // 3
+    assert struct.unpack_from('<I', hashed, 20)[0] == 11
+    assert struct.unpack_from('<I', plain, 20)[0] == 0
+    for key, value in pairs.items():
+        assert lookup_mo(hashed, key.split(b'\x00')[0]) == value
+    assert lookup_mo(hashed, 'a verb\x04open'.encode()) == 'открыть'.encode()
+    assert lookup_mo(hashed, b'unknown') is None
+    assert read_mo(hashed_path)._catalog == read_mo(plain_path)._catalog  # type: ignore
+
+
+def test_compile_po__hash_table_collisions(tmp_path: Path):
+    po_path = tmp_path / 'ru.po'
+    entries = ''.join(f'msgid "msg {i}"\nmsgstr "сообщение {i}"\n\n' for i in range(500))
+    po_path.write_text(HEADER + entries, encoding='utf8')
+    mo_path = tmp_path / 'ru.mo'
+    assert compile_po(po_path, mo_path, hash_table=True) == 500
+    content = mo_path.read_bytes()
+    for i in range(500):
+        assert lookup_mo(content, f'msg {i}'.encode()) == f'сообщение {i}'.encode()
+    translations = read_mo(mo_path)
+    assert translations.gettext('msg 123') == 'сообщение 123'
+
+
+@pytest.mark.parametrize('key, expected', [
+    (b'', 0),
+    (b'a', 0x61),
+    (b'ab', 0x61 * 16 + 0x62),
+    (b'one\x00many', hash_key(b'one')),
+    # long keys overflow the 28 bits and the highest nibble is folded back
+    (b'abcdefgh', 0x89abaa8),
+])
+def test_hash_key(key: bytes, expected: int):
+    assert hash_key(key) == expected
+
+
+@pytest.mark.parametrize('seed, expected', [
+    (0, 3), (3, 3), (8, 11), (10, 11), (12, 13), (667, 673),
+])
+def test_next_prime(seed: int, expected: int):
+    assert next_prime(seed) == expected
+
+
+@pytest.mark.parametrize('hash_table', [False, True])
+def test_build_mo__keep(tmp_path: Path, hash_table: bool):
+    po_path = tmp_path / 'ru.po'
+    po_path.write_text(PO.replace('{charset}', 'UTF-8'), encoding='utf8')
+    full = build_mo(po_path, hash_table=hash_table)
+    assert full is not None
+    assert full[0].translated == 7
+    assert len(full[1]) == get_mo_size(read_po(po_path).pairs, hash_table=hash_table)
+
+    keep = {(None, 'hello'), ('a verb', 'open'), (None, '{n} bird'), (None, 'unknown')}
+    pruned = build_mo(po_path, hash_table=hash_table, keep=keep)
+    assert pruned is not None
+    compiled, content = pruned
+    assert compiled.translated == 3
+    assert compiled.pruned == 4
+    assert compiled.saved == len(full[1]) - len(content)
+    mo_path = tmp_path / 'ru.mo'
+    mo_path.write_bytes(content)
+    translations = read_mo(mo_path)
+    assert translations.gettext('hello') == 'привет'
+    assert translations.pgettext('a verb', 'open') == 'открыть'
+    assert translations.ngettext('{n} bird', '{n} birds', 3) == '{n} птицы'
+    assert translations.gettext('after obsolete') == 'after obsolete'
+    assert translations.gettext('fuzzy') == 'fuzzy'
+    assert translations.info()['language'] == 'ru'
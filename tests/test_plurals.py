@@ -0,0 +1,47 @@
+import gettext
+
+import pytest
+
+from l10n._plurals import GERMANIC, PLURALS, SINGULAR, compile_plural_many
+
+
+numpy = pytest.importorskip('numpy')
+COUNTS = list(range(0, 1200)) + [10 ** 6 + 1, 2 ** 40 + 11]
+
+
+@pytest.mark.parametrize('lang', sorted(PLURALS))
+def test_compile_plural_many__same_as_gettext(lang: str):
+    expr = PLURALS[lang].expr
+    plural = gettext.c2py(expr)
+    expected = [plural(n) for n in COUNTS]
+    actual = compile_plural_many(expr)(numpy.array(COUNTS))
+    assert actual.tolist() == expected
+
+
+@pytest.mark.parametrize('expr', [
+    GERMANIC.expr,
+    SINGULAR.expr,
+    '(n == 1) + (n > 5) * 2',
+    'n % 3 ? n / 3 : 7',
+    'n > 3 && n < 7 || n == 100',
+    '!(n % 10) ? 1 : !n',
+])
+def test_compile_plural_many__expressions(expr: str):
+    plural = gettext.c2py(expr)
+    expected = [plural(n) for n in COUNTS]
+    actual = compile_plural_many(expr)(COUNTS)
+    assert actual.tolist() == expected
+
+
+@pytest.mark.parametrize('expr', [
+    'n ==',
+    'n == 1 ? 0',
+    '(n == 1',
+    'n == 1)',
+    'import os',
+    'n.real',
+    '-n',
+])
+def test_compile_plural_many__invalid(expr: str):
+    with pytest.raises(ValueError):
+        compile_plural_many(expr)
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import pytest
+
+from l10n._project import find_project_root
+from l10n._workspace import Workspace
+
+
+@pytest.fixture
+def monorepo(tmp_path: Path) -> Path:
+    (tmp_path / '.git').mkdir()
+    for name in ('alpha', 'beta', 'gamma'):
+        root = tmp_path / 'packages' / name
+        (root / name / 'sub').mkdir(parents=True)
+        (root / 'pyproject.toml').write_text(f'[tool.l10n]\nname = "{name}"\n')
+        (root / name / '__init__.py').write_text('')
+        (root / name / 'sub' / 'core.py').write_text('')
+        if name != 'gamma':
+            (root / 'locales').mkdir()
+    (tmp_path / 'scripts').mkdir()
+    (tmp_path / 'scripts' / 'run.py').write_text('')
+    (tmp_path / '.venv' / 'delta').mkdir(parents=True)
+    (tmp_path / '.venv' / 'delta' / 'pyproject.toml').write_text('')
+    (tmp_path / '.venv' / 'delta' / 'locales').mkdir()
+    return tmp_path
+
+
+def test_find_root(monorepo: Path, monkeypatch: pytest.MonkeyPatch):
+    workspace = Workspace(monorepo)
+    paths = [
+        monorepo / 'packages' / 'alpha' / 'alpha' / 'sub' / 'core.py',
+        monorepo / 'packages' / 'alpha' / 'alpha' / '__init__.py',
+        monorepo / 'packages' / 'beta' / 'beta' / 'sub' / 'core.py',
+        monorepo / 'scripts' / 'run.py',
+    ]
+    for path in paths:
+        assert workspace.find_root(path) == find_project_root(path)
+    assert workspace.find_root(paths[0]) == monorepo / 'packages' / 'alpha'
+    assert workspace.find_root(paths[3]) == monorepo
+
+    # all directories are already known, the file system isn't checked again
+    monkeypatch.setattr(Path, 'is_file', None)
+    monkeypatch.setattr(Path, 'is_dir', None)
+    for path in paths:
+        workspace.find_root(path)
+
+
+def test_projects(monorepo: Path):
+    workspace = Workspace(monorepo)
+    assert [p.name for p in workspace.projects] == ['alpha', 'beta']
+    root = monorepo / 'packages' / 'alpha'
+    assert workspace.get_project(root) is workspace.projects[0]